@@ -0,0 +1,135 @@
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # Only the batch pricing needs numpy so the rest of the program runs without it
+    raise ImportError('Batch pricing needs numpy (install it with "pip install numpy")')
+
+from menu import MenuIndex
+from money import RATE_SCALE, SCOOPS_SCALE, to_tenths
+from order import Order
+
+
+class OrderBatch:
+    quantities: np.ndarray  # The amount of each item per order (orders x menu ordinals)
+    chips: np.ndarray  # The tenths of scoops of each lot of chips per order (orders x lots, 0 for no lot)
+    frozen: np.ndarray  # Whether or not each order is frozen
+    delivery: np.ndarray  # Whether or not each order is being delivered
+
+    def __init__(self, quantities: np.ndarray, chips: np.ndarray, frozen: np.ndarray,
+                 delivery: np.ndarray) -> None:
+        """
+        A columnar batch of orders where each row is one order
+
+        :param quantities: The amount of each item per order (orders x menu ordinals)
+        :param chips: The tenths of scoops of each lot of chips per order (orders x lots, 0 for no lot)
+        :param frozen: Whether or not each order is frozen
+        :param delivery: Whether or not each order is being delivered
+        """
+        self.quantities = np.asarray(quantities, dtype=np.int64)
+        self.chips = np.asarray(chips, dtype=np.int64)
+        self.frozen = np.asarray(frozen, dtype=bool)
+        self.delivery = np.asarray(delivery, dtype=bool)
+
+    def __len__(self) -> int:
+        """
+        :return: The number of orders in the batch
+        """
+        return len(self.frozen)
+
+    @staticmethod
+    def from_orders(orders: List[Order], menu: MenuIndex) -> 'OrderBatch':
+        """
+        Converts a list of orders into a columnar batch
+
+        :param orders: The orders to convert
+        :param menu: The menu index the item columns are taken from
+        :return: The created batch
+        """
+        # The column of each item is its ordinal - 1
+        columns: dict = {name: index for index, name in enumerate(menu.ordinals)}
+        # The most lots of chips in any order decides the width of the chips columns
+        max_lots: int = max((order.chips_count() for order in orders), default=0)
+        quantities: np.ndarray = np.zeros((len(orders), menu.total_items), dtype=np.int64)
+        chips: np.ndarray = np.zeros((len(orders), max_lots), dtype=np.int64)
+        for row, order in enumerate(orders):
+            for fish_type, amount in order.fish_items():
+                quantities[row, columns[fish_type]] = amount
+            chips[row, :order.chips_count()] = [to_tenths(amount) for amount in order.chips]
+        frozen: np.ndarray = np.fromiter((order.frozen for order in orders), dtype=bool, count=len(orders))
+        delivery: np.ndarray = np.fromiter((order.delivery for order in orders), dtype=bool, count=len(orders))
+        return OrderBatch(quantities, chips, frozen, delivery)
+
+
+def divide_round(values: np.ndarray, divisor: int) -> np.ndarray:
+    """
+    Divides an array of integers rounding half away from
+    zero the same as money.divide_round
+
+    :param values: The values to divide
+    :param divisor: The positive value to divide by
+    :return: The rounded results
+    """
+    rounded: np.ndarray = (np.abs(values) * 2 + divisor) // (divisor * 2)
+    return np.where(values < 0, -rounded, rounded)
+
+
+def item_prices(menu: MenuIndex) -> np.ndarray:
+    """
+    Creates the price vector for the menu where each price
+    is in the column of its item (chips are priced separately
+    so their column is 0)
+
+    :param menu: The menu index to take prices from
+    :return: The price in cents of each item ordinal
+    """
+    return np.fromiter((menu.get_price(name, False) for name in menu.ordinals), dtype=np.int64,
+                       count=menu.total_items)
+
+
+def calculate_batch_prices(batch: OrderBatch, menu: MenuIndex, frozen_discount: int, gst_amount: int,
+                           delivery_charge: int, prices: np.ndarray = None, chips_price: int = None) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculates the prices of every order in the batch at once, this
+    gives the same figures as Order.calculate_prices for each row.
+    Alternative prices can be provided to see what the orders would
+    have cost with different pricing
+
+    :param batch: The batch of orders to price
+    :param menu: The menu index the batch columns are from
+    :param frozen_discount: The discount amount in cents per frozen fish item
+    :param gst_amount: The amount of GST (Government Service Tax) in basis points
+    :param delivery_charge: The amount charged for delivery in cents
+    :param prices: The price in cents of each item ordinal (defaults to the menu prices)
+    :param chips_price: The price in cents per scoop of chips (defaults to the menu price)
+    :return: The frozen discounts, total prices, gst amounts, and gst inclusive prices in cents
+    """
+    if prices is None:
+        prices = item_prices(menu)
+    if chips_price is None:
+        chips_price = menu.get_price('Chips', True)
+    # The number of different fish types in each order (each one gets a frozen discount)
+    fish_lines: np.ndarray = np.count_nonzero(batch.quantities, axis=1)
+    # The number of lots of chips in each order
+    chips_lines: np.ndarray = np.count_nonzero(batch.chips, axis=1)
+    # Orders without any items are priced at 0 like the scalar method
+    empty: np.ndarray = (fish_lines == 0) & (chips_lines == 0)
+
+    # The discount is only given to frozen orders
+    frozen_discounts: np.ndarray = np.where(batch.frozen, fish_lines * frozen_discount, 0)
+    # The price of each lot of chips rounded to the nearest cent like the scalar method
+    chips_prices: np.ndarray = divide_round(batch.chips * chips_price, SCOOPS_SCALE)
+    # The price of the items (fish amount * price + price of the scoops)
+    total_prices: np.ndarray = batch.quantities @ prices + chips_prices.sum(axis=1)
+    total_prices -= frozen_discounts
+    total_prices += np.where(batch.delivery, delivery_charge, 0)
+
+    frozen_discounts[empty] = 0
+    total_prices[empty] = 0
+    # The gst amount of the total (e.g $total * 15%) rounded half up to the nearest cent
+    total_gst: np.ndarray = divide_round(total_prices * gst_amount, RATE_SCALE)
+    # The total amount inclusive of gst (total + gst)
+    total_inc_gst: np.ndarray = total_prices + total_gst
+    return frozen_discounts, total_prices, total_gst, total_inc_gst
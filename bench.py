@@ -0,0 +1,228 @@
+import asyncio
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from time import time
+from timeit import Timer
+from typing import Callable, Dict, Iterator, List, NoReturn, Tuple
+
+from driver import ScriptedConsole, run_session
+from guiutil import create_menu, create_order_list, create_prompt, build_prompt, get_item_price
+from ingest import order_schema
+from input import Schema, Validation, ValidationError
+from loadtest import SCRIPT
+from main import MAX_PER_FISH, MAX_AMOUNT_CHIPS, MAX_SCOOPS_CHIPS, FROZEN_DISCOUNT, GST_AMOUNT, DELIVERY_CHARGE
+from menu import MenuIndex
+from order import Order, OrderConfig
+
+MENU_SIZES: List[int] = [12, 120, 1200]  # The amounts of fish on the menus that are benchmarked
+ORDER_SIZES: List[int] = [1, 10, 100, 1000]  # The amounts of fish lines in the orders that are benchmarked
+SECTION_SIZE: int = 6  # The amount of fish in each section of a benchmark menu
+CHIPS_PER_ORDER: int = 3  # The amount of lots of chips in each benchmark order
+REPEAT: int = 5  # The amount of times each benchmark is timed (the fastest is kept)
+MIN_TIME: float = 0.2  # The least seconds each timing should take
+THRESHOLD: float = 0.1  # How much slower than the baseline a benchmark can be (0.1 = 10%)
+
+# A benchmark is its name and the function that is timed
+Benchmark = Tuple[str, Callable[[], object]]
+
+
+def make_menu(size: int) -> List[dict]:
+    """
+    Creates a menu with the provided amount of fish split into
+    sections (along with chips) the same shape as the real menu
+
+    :param size: The amount of fish on the menu
+    :return: The types of the menu
+    """
+    types: List[dict] = []
+    for start in range(0, size, SECTION_SIZE):
+        types.append({
+            'name': f'Section {len(types) + 1}',
+            'price': 4.10 + len(types) % 4,
+            'price_format': '{} each',
+            'items': [f'Fish {index + 1}' for index in range(start, min(start + SECTION_SIZE, size))]
+        })
+    types.append({
+        'name': 'Chips',
+        'price': 2.00,
+        'price_format': '{} per scoop',
+        'text': 'Specify custom amount'
+    })
+    return types
+
+
+def make_order(config: OrderConfig, lines: int) -> Order:
+    """
+    Creates a frozen delivery order with the provided amount of fish lines
+
+    :param config: The limits and pricing of the order (its menu must have enough fish)
+    :param lines: The amount of different fish in the order
+    :return: The created order
+    """
+    order: Order = Order(config)
+    order.name = 'Bench'
+    order.phone = '021 000 0000'
+    order.address = '1 Bench Road'
+    order.delivery = True
+    order.frozen = True
+    for ordinal in range(1, lines + 1):
+        order.add_fish(config.menu.get_item(ordinal), ordinal % MAX_PER_FISH + 1)
+    for index in range(CHIPS_PER_ORDER):
+        order.add_chips(index + 1.5)
+    return order
+
+
+def make_config(menu: MenuIndex) -> OrderConfig:
+    """
+    :param menu: The compiled menu
+    :return: The same limits and pricing as the real system using the menu
+    """
+    return OrderConfig(
+        MAX_PER_FISH, MAX_AMOUNT_CHIPS, MAX_SCOOPS_CHIPS,
+        FROZEN_DISCOUNT, GST_AMOUNT, DELIVERY_CHARGE, menu
+    )
+
+
+def invalid_int() -> NoReturn:
+    """
+    Validates input that isn't a number (the error path)
+    """
+    try:
+        Validation.int('twelve')
+    except ValidationError:
+        pass
+
+
+def benchmarks() -> Iterator[Benchmark]:
+    """
+    :return: Every benchmark in the suite
+    """
+    for size in MENU_SIZES:
+        types: List[dict] = make_menu(size)
+        menu: MenuIndex = MenuIndex(types)
+        last: str = menu.get_item(size)
+        yield f'create_menu[menu={size}]', lambda types=types: create_menu(types)
+        yield f'get_item_price[menu={size}]', lambda menu=menu, last=last: get_item_price(menu, last, False)
+
+    for size in ORDER_SIZES:
+        config: OrderConfig = make_config(MenuIndex(make_menu(max(size, MENU_SIZES[0]))))
+        order: Order = make_order(config, size)
+        yield f'create_order_list[order={size}]', lambda order=order: create_order_list(order, order.config.menu)
+        yield f'calculate_prices[order={size}]', order.calculate_prices
+
+    lines: List[str] = [
+        'Enter "back" to go back or enter the amount of',
+        '"Snapper" you would like. You cannot add more',
+        'than 7'
+    ]
+    yield 'create_prompt[cached]', lambda: create_prompt(lines)
+    yield 'create_prompt[uncached]', lambda: (build_prompt.cache_clear(), create_prompt(lines))
+
+    yield 'Validation.int', lambda: Validation.int('42')
+    yield 'Validation.int[invalid]', invalid_int
+    yield 'Validation.float', lambda: Validation.float('2.5')
+    yield 'Validation.boolean', lambda: Validation.boolean('yes')
+    yield 'Validation.min_max', lambda: Validation.min_max(5, 1, 7)
+
+    schema: Schema = order_schema(make_config(MenuIndex(make_menu(MENU_SIZES[0]))))
+    record: dict = {'name': 'Bob', 'phone': '021', 'frozen': 'y', 'fish': {'Fish 1': 2}, 'chips': [1.5, 2]}
+    invalid: dict = {'name': 'Bob', 'phone': '021', 'frozen': 'maybe', 'fish': {'Fish 1': 'twelve'}, 'chips': [9]}
+    yield 'Schema.validate', lambda: schema.validate(record)
+    yield 'Schema.validate[invalid]', lambda: schema.validate(invalid)
+
+    loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+    yield 'session', lambda: loop.run_until_complete(run_session(ScriptedConsole(SCRIPT)))
+
+
+def measure(function: Callable[[], object]) -> float:
+    """
+    Times a function taking the fastest of multiple timings
+    (the slower timings are noise from the rest of the system)
+
+    :param function: The function to time
+    :return: The seconds a single call takes
+    """
+    timer: Timer = Timer(function)
+    # Find how many calls take at least the minimum time
+    number, _ = timer.autorange()
+    number = max(1, int(number * MIN_TIME / 0.2))
+    return min(timer.repeat(REPEAT, number)) / number
+
+
+def run_benchmarks(name_filter: str or None = None) -> Dict[str, float]:
+    """
+    Runs the benchmarks printing each result as it finishes
+
+    :param name_filter: Only run the benchmarks containing this text (None runs all of them)
+    :return: The seconds a single call of each benchmark takes
+    """
+    results: Dict[str, float] = {}
+    for name, function in benchmarks():
+        if name_filter is not None and name_filter not in name:
+            continue
+        seconds: float = measure(function)
+        results[name] = seconds
+        print(f'{name:<36} {seconds * 1e6:>12.3f}us {1 / seconds:>14,.0f}/s')
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Compares the results against the baseline
+
+    :param results: The seconds of each benchmark
+    :param baseline: The seconds of each benchmark in the baseline
+    :param threshold: How much slower than the baseline a benchmark can be (0.1 = 10%)
+    :return: The names of the benchmarks that got slower than the threshold
+    """
+    regressions: List[str] = []
+    print()
+    print(f'{"Benchmark":<36} {"Baseline":>14} {"Current":>14} {"Change":>9}')
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue  # A new benchmark
+        change: float = seconds / baseline[name] - 1
+        marker: str = ''
+        if change > threshold:
+            regressions.append(name)
+            marker = ' REGRESSION'
+        print(f'{name:<36} {baseline[name] * 1e6:>12.3f}us {seconds * 1e6:>12.3f}us {change:>+9.1%}{marker}')
+    return regressions
+
+
+def run() -> NoReturn:
+    """
+    Runs the benchmark suite from the command line
+    """
+    parser: ArgumentParser = ArgumentParser(description='Benchmarks the hot paths of the ordering system')
+    parser.add_argument('--output', help='Write the results as json to this file')
+    parser.add_argument('--baseline', help='Compare against the results in this json file')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='How much slower than the baseline is a regression (0.1 = 10%%)')
+    parser.add_argument('--filter', help='Only run the benchmarks containing this text')
+    args = parser.parse_args()
+
+    results: Dict[str, float] = run_benchmarks(args.filter)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'time': time(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline: Dict[str, float] = json.load(file)['results']
+        regressions: List[str] = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} benchmarks are more than {args.threshold:.0%} slower than the baseline')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,156 @@
+import os
+import re
+import sys
+from contextvars import ContextVar
+from re import Pattern
+from typing import List, NoReturn, TextIO
+
+from metrics import record_screen
+
+ANSI_PATTERN: Pattern = re.compile(r'\033\[[0-9;]*m')  # Matches the terminal color codes
+
+
+def use_color(stream: TextIO) -> bool:
+    """
+    Decides whether colors should be written to a stream. Colors are
+    only written to terminals unless NO_COLOR or FORCE_COLOR is set
+
+    :param stream: The stream the output is written to
+    :return: Whether or not to keep the color codes
+    """
+    if 'NO_COLOR' in os.environ:
+        return False
+    if 'FORCE_COLOR' in os.environ:
+        return True
+    return stream.isatty()
+
+
+class Console:
+    stream: TextIO  # The stream the output is written to
+    color: bool  # Whether or not to keep the color codes in the output
+    buffer: List[str]  # The output of the current screen that hasn't been written yet
+    screens: int  # The amount of screens that have been written
+    bytes_written: int  # The total amount of bytes that have been written
+
+    def __init__(self, stream: TextIO or None = None, color: bool or None = None) -> None:
+        """
+        A console that collects everything written to it and only writes
+        it out when the user is asked for input, so each screen is written
+        all at once instead of a separate write for every line
+
+        :param stream: The stream the output is written to (defaults to stdout)
+        :param color: Whether or not to keep the color codes (defaults to only for terminals)
+        """
+        self.stream = sys.stdout if stream is None else stream
+        self.color = use_color(self.stream) if color is None else color
+        self.buffer = []
+        self.screens = 0
+        self.bytes_written = 0
+
+    async def read(self, message: str) -> str:
+        """
+        Displays the message to the user and
+        reads a line of their input
+
+        :param message: The message to display to the user
+        :return: The line the user entered
+        """
+        # The message is written along with the rest of the screen
+        self.buffer.append(message)
+        self.flush()
+        # A local till only has one user so blocking here is fine
+        return input()
+
+    def write(self, text: str) -> NoReturn:
+        """
+        Writes a line of text to the user (this is
+        written along with the rest of the screen)
+
+        :param text: The text to write
+        """
+        self.buffer.append(text)
+        self.buffer.append('\n')
+
+    def flush(self) -> NoReturn:
+        """
+        Writes out the current screen all at once
+        """
+        if not self.buffer:
+            return
+        screen: str = ''.join(self.buffer)
+        self.buffer.clear()
+        if not self.color:
+            # The color codes would show up as junk in files and pipes
+            screen = ANSI_PATTERN.sub('', screen)
+        data: bytes = screen.encode()
+        self.screens += 1
+        self.bytes_written += len(data)
+        record_screen(len(data))
+        self.send(data)
+
+    def send(self, data: bytes) -> NoReturn:
+        """
+        Writes a screen to the stream
+
+        :param data: The encoded screen
+        """
+        binary: object = getattr(self.stream, 'buffer', None)
+        if binary is None:  # A text only stream (e.g StringIO)
+            self.stream.write(data.decode())
+            return
+        # Anything written to the stream some other way goes first
+        self.stream.flush()
+        binary.write(data)
+        binary.flush()
+
+
+# The console that the screens read from and write to. This is a context
+# variable so that each session task on a server can have its own console
+console: ContextVar = ContextVar('console', default=Console())
+
+
+def get_console() -> Console:
+    """
+    :return: The console of the current session
+    """
+    return console.get()
+
+
+def set_console(value: Console) -> Console:
+    """
+    Replaces the console that the screens of the current
+    session read from and write to (e.g with a scripted console)
+
+    :param value: The new console
+    :return: The console that was replaced
+    """
+    previous: Console = console.get()
+    console.set(value)
+    return previous
+
+
+async def read(message: str) -> str:
+    """
+    Reads a line of input using the current console
+
+    :param message: The message to display to the user
+    :return: The line the user entered
+    """
+    return await console.get().read(message)
+
+
+def write(text: str) -> NoReturn:
+    """
+    Writes a line of text using the current console
+
+    :param text: The text to write
+    """
+    console.get().write(text)
+
+
+def flush() -> NoReturn:
+    """
+    Writes out anything the current console is still holding
+    (e.g the last screen before the program exits)
+    """
+    console.get().flush()
@@ -0,0 +1,222 @@
+import os
+import sys
+from array import array
+from time import localtime, strftime, time
+from typing import Dict, List, NoReturn, Tuple
+
+from guiutil import BOX_TOP, BOX_SPLITTER, BOX_BOTTOM, Sink, create_title, format_price, item_padded
+from money import divide_round
+from order import Order
+
+WINDOW_MINUTES: Tuple[int, ...] = (5, 15, 60)  # The lengths of the windows the sales are shown for
+BUCKET_SECONDS: int = 10  # The sales are counted in buckets of this many seconds
+REFRESH_INTERVAL: float = 2.0  # The seconds between redrawing the dashboard
+CLEAR_SCREEN: str = '\033[H\033[2J'  # Moves the cursor to the top and clears the terminal
+
+
+class RollingSales:
+    bucket_seconds: int  # The seconds each bucket covers
+    minutes: Dict[int, int]  # The length of each window in minutes mapped to its index
+    lengths: List[int]  # The amount of buckets in each window
+    orders: array  # The amount of orders in each bucket (a ring indexed by bucket number)
+    revenue: array  # The revenue in cents of each bucket (a ring indexed by bucket number)
+    window_orders: List[int]  # The running amount of orders in each window
+    window_revenue: List[int]  # The running revenue in cents of each window
+    current: int  # The number of the newest bucket (the seconds since the epoch / bucket seconds)
+
+    def __init__(self, minutes: Tuple[int, ...] = WINDOW_MINUTES, bucket_seconds: int = BUCKET_SECONDS,
+                 now: float or None = None) -> None:
+        """
+        Counts the orders and revenue of the last few minutes. The sales
+        are kept in a fixed ring of buckets (only enough to cover the
+        longest window) so the memory used never grows, and the total
+        of each window is kept running so adding a sale and reading a
+        window never has to look at the buckets
+
+        :param minutes: The lengths of the windows in minutes
+        :param bucket_seconds: The seconds each bucket covers
+        :param now: The current time (defaults to the time now)
+        """
+        self.bucket_seconds = bucket_seconds
+        self.minutes = {length: index for index, length in enumerate(minutes)}
+        self.lengths = [length * 60 // bucket_seconds for length in minutes]
+        size: int = max(self.lengths)
+        self.orders = array('I', [0]) * size
+        self.revenue = array('q', [0]) * size
+        self.window_orders = [0] * len(minutes)
+        self.window_revenue = [0] * len(minutes)
+        self.current = int((time() if now is None else now) // bucket_seconds)
+
+    def advance(self, bucket: int) -> NoReturn:
+        """
+        Moves the newest bucket forward, taking the buckets that fall
+        out of each window off its running total. Each bucket is only
+        moved past once so this is constant time for each bucket of time
+        that passes, and clearing the whole ring is the most it ever does
+
+        :param bucket: The number of the new newest bucket
+        """
+        steps: int = bucket - self.current
+        if steps <= 0:
+            return
+        size: int = len(self.orders)
+        if steps >= size:
+            # Nothing was sold within the longest window so everything is cleared
+            for index in range(size):
+                self.orders[index] = 0
+                self.revenue[index] = 0
+            self.window_orders = [0] * len(self.lengths)
+            self.window_revenue = [0] * len(self.lengths)
+        else:
+            for number in range(self.current + 1, bucket + 1):
+                for index, length in enumerate(self.lengths):
+                    # The bucket that is no longer inside this window
+                    slot: int = (number - length) % size
+                    self.window_orders[index] -= self.orders[slot]
+                    self.window_revenue[index] -= self.revenue[slot]
+                # The slot of the new bucket last held a bucket that has left every window
+                slot: int = number % size
+                self.orders[slot] = 0
+                self.revenue[slot] = 0
+        self.current = bucket
+
+    def add(self, timestamp: float, revenue: int) -> NoReturn:
+        """
+        Adds a finished order to the bucket of the time it was finished.
+        Orders older than the longest window are ignored
+
+        :param timestamp: The time the order was finished
+        :param revenue: The total of the order in cents
+        """
+        bucket: int = int(timestamp // self.bucket_seconds)
+        self.advance(bucket)
+        age: int = self.current - bucket
+        if age >= len(self.orders):
+            return
+        slot: int = bucket % len(self.orders)
+        self.orders[slot] += 1
+        self.revenue[slot] += revenue
+        for index, length in enumerate(self.lengths):
+            if age < length:  # The bucket is inside this window
+                self.window_orders[index] += 1
+                self.window_revenue[index] += revenue
+
+    def window(self, minutes: int, now: float or None = None) -> Tuple[int, int]:
+        """
+        Finds the sales of one of the windows
+
+        :param minutes: The length of the window in minutes
+        :param now: The current time (defaults to the time now)
+        :return: The amount of orders and the revenue in cents
+        """
+        self.advance(int((time() if now is None else now) // self.bucket_seconds))
+        index: int = self.minutes[minutes]
+        return self.window_orders[index], self.window_revenue[index]
+
+
+# The sales of this program (each till confirming an order adds to it)
+sales: RollingSales = RollingSales()
+
+
+def record_sale(order: Order) -> NoReturn:
+    """
+    Adds a confirmed order to the sales of this program
+
+    :param order: The confirmed order
+    """
+    sales.add(time(), order.calculate_prices()[3])
+
+
+def write_panel(rolling: RollingSales, sink: Sink, now: float or None = None) -> NoReturn:
+    """
+    Renders the sales of each window as a box piece by piece into the sink
+
+    :param rolling: The sales being shown
+    :param sink: Accepts each piece of the panel
+    :param now: The current time (defaults to the time now)
+    """
+    now: float = time() if now is None else now
+    sink(BOX_TOP)
+    sink(create_title('Live Sales ' + strftime('%H:%M:%S', localtime(now))))
+    sink(BOX_SPLITTER)
+    sink(item_padded(f' {"Window":<12}{"Orders":>10}{"Per Minute":>14}{"Revenue":>18}{"Avg Basket":>16}'))
+    sink(BOX_SPLITTER)
+    for minutes in rolling.minutes:
+        orders, revenue = rolling.window(minutes, now)
+        per_minute: float = orders / minutes
+        basket: int = divide_round(revenue, orders) if orders > 0 else 0
+        sink(item_padded(
+            f' {f"Last {minutes} min":<12}{orders:>10}{per_minute:>14.1f}'
+            f'{format_price(revenue):>18}{format_price(basket):>16}'
+        ))
+    sink(BOX_BOTTOM)
+    sink('\n')
+
+
+def create_panel(rolling: RollingSales, now: float or None = None) -> str:
+    """
+    Creates a string representation of the sales of each window
+
+    :param rolling: The sales being shown
+    :param now: The current time (defaults to the time now)
+    :return: The string representation of the panel
+    """
+    pieces: List[str] = []
+    write_panel(rolling, pieces.append, now)
+    return ''.join(pieces)
+
+
+def follow(path: str, rolling: RollingSales, position: 'JournalPosition') -> NoReturn:
+    """
+    Adds the orders written to the journal since the last look
+
+    :param path: The path of the journal
+    :param rolling: The sales the orders are added to
+    :param position: How far through the journal the orders have been added (moved past the new orders)
+    """
+    # Only the command line follows a journal so the screens recording their sales don't load the reader
+    from journal import JournalReader, decode_record
+    if not os.path.exists(path):
+        return
+    # The journal is opened again each time as it is mapped at the size it was opened at
+    with JournalReader(path) as reader:
+        # A journal that was rotated or replaced is read from its start
+        position.resume(reader)
+        for payload in position.scan(reader):
+            record: dict = decode_record(payload)
+            payload.release()
+            rolling.add(record['time'], record['total_inc_gst'])
+
+
+def run() -> NoReturn:
+    """
+    Shows the live sales of a journal from the command line
+    """
+    # Imported here as the screens import this module to record their sales
+    from argparse import ArgumentParser
+    from time import sleep
+    from journal import JournalPosition
+    from main import JOURNAL_PATH
+    parser: ArgumentParser = ArgumentParser(description='Shows the live sales of the finished orders')
+    parser.add_argument('journal', nargs='?', default=JOURNAL_PATH, help='The order journal to follow')
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL, help='The seconds between redraws')
+    parser.add_argument('--once', action='store_true', help='Show the sales once and exit')
+    args = parser.parse_args()
+
+    rolling: RollingSales = RollingSales()
+    position: JournalPosition = JournalPosition()
+    try:
+        while True:
+            follow(args.journal, rolling, position)
+            if args.once:
+                sys.stdout.write(create_panel(rolling))
+                return
+            sys.stdout.write(CLEAR_SCREEN + create_panel(rolling))
+            sys.stdout.flush()
+            sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import sys
+from argparse import ArgumentParser
+from time import perf_counter, sleep
+from typing import Iterable, Iterator, List, NoReturn, TextIO, Tuple
+
+import console
+from console import Console
+
+
+class EndOfScript(EOFError):
+    """
+    Raised when a scripted console has run out of input
+    (this ends the session the same as EOF on a real terminal)
+    """
+
+
+class ScriptedConsole(Console):
+    lines: Iterator[str]  # The remaining lines of input
+    sink: TextIO or None  # Where the output is written to (None discards it)
+    keystrokes: int  # The number of characters of input that have been read
+
+    def __init__(self, lines: Iterable[str], sink: TextIO or None = None) -> None:
+        """
+        A console that reads its input from a script instead
+        of the user so that whole sessions can be run without
+        anyone typing. The output is buffered and has its colors
+        removed (unless the sink is a terminal) the same as a till
+
+        :param lines: The lines of input
+        :param sink: Where the output is written to (None discards it)
+        """
+        # Discarded output is never shown so there is no point removing its colors
+        super().__init__(sink, None if sink is not None else True)
+        self.lines = iter(lines)
+        self.sink = sink
+        self.keystrokes = 0
+
+    def next_line(self) -> str:
+        """
+        :return: The next line of input from the script
+        """
+        try:
+            return next(self.lines)
+        except StopIteration:
+            raise EndOfScript()
+
+    async def read(self, message: str) -> str:
+        """
+        Displays the message and reads the next line of the script
+
+        :param message: The message to display
+        :return: The next line of input
+        """
+        # The message is written along with the rest of the screen
+        self.buffer.append(message)
+        self.flush()
+        line: str = self.next_line()
+        if self.sink is not None:
+            # Echo the input like a terminal would (written with the next screen)
+            self.buffer.append(line + '\n')
+        self.keystrokes += len(line) + 1  # Include the enter key
+        return line
+
+    def send(self, data: bytes) -> NoReturn:
+        """
+        Writes a screen to the sink (or discards it if there is no sink)
+
+        :param data: The encoded screen
+        """
+        if self.sink is not None:
+            super().send(data)
+
+
+class RecordingConsole(Console):
+    file: TextIO  # The file the recording is written to
+    start: float  # The time the recording started
+
+    def __init__(self, file: TextIO, stream: TextIO or None = None) -> None:
+        """
+        A console for a user typing a session that also records every
+        line of input along with the time it was entered so that the
+        session can be replayed
+
+        :param file: The file the recording is written to
+        :param stream: The stream the output is written to (defaults to stdout)
+        """
+        super().__init__(stream)
+        self.file = file
+        self.start = perf_counter()
+
+    async def read(self, message: str) -> str:
+        """
+        Reads a line from the user and writes it to the recording
+
+        :param message: The message to display
+        :return: The line that was entered
+        """
+        line: str = await super().read(message)
+        # Each event is a json line with the time in seconds since the start
+        self.file.write(json.dumps({'time': perf_counter() - self.start, 'input': line}) + '\n')
+        self.file.flush()
+        return line
+
+
+class ReplayConsole(ScriptedConsole):
+    times: Iterator[float]  # The time of each line since the start of the recording
+    realtime: bool  # Whether or not to wait for the recorded time before each line
+    start: float  # The time the replay started
+
+    def __init__(self, events: List[Tuple[float, str]], sink: TextIO or None = None,
+                 realtime: bool = False) -> None:
+        """
+        A console that replays a recorded session either
+        at full speed or at the speed it was recorded
+
+        :param events: The recorded (time, input) events
+        :param sink: Where the output is written to (None discards it)
+        :param realtime: Whether or not to wait for the recorded time before each line
+        """
+        super().__init__((line for _, line in events), sink)
+        self.times = iter([time for time, _ in events])
+        self.realtime = realtime
+        self.start = perf_counter()
+
+    def next_line(self) -> str:
+        """
+        :return: The next recorded line (waiting for its time in realtime mode)
+        """
+        line: str = super().next_line()
+        time: float = next(self.times)
+        if self.realtime:
+            delay: float = time - (perf_counter() - self.start)
+            if delay > 0:
+                sleep(delay)
+        return line
+
+
+def load_recording(file: TextIO) -> List[Tuple[float, str]]:
+    """
+    Loads the events of a recorded session
+
+    :param file: The file the recording was written to
+    :return: The recorded (time, input) events
+    """
+    events: List[Tuple[float, str]] = []
+    for line in file:
+        if line.strip():
+            event: dict = json.loads(line)
+            events.append((event['time'], event['input']))
+    return events
+
+
+class SessionResult:
+    screens: int  # The number of prompts that were displayed
+    keystrokes: int  # The number of characters of input that were read
+    seconds: float  # The time the session took
+
+    def __init__(self, screens: int, keystrokes: int, seconds: float) -> None:
+        """
+        The measurements of a scripted session
+
+        :param screens: The number of prompts that were displayed
+        :param keystrokes: The number of characters of input that were read
+        :param seconds: The time the session took
+        """
+        self.screens = screens
+        self.keystrokes = keystrokes
+        self.seconds = seconds
+
+    def screens_per_second(self) -> float:
+        """
+        :return: The number of prompts displayed per second
+        """
+        return self.screens / self.seconds if self.seconds > 0 else 0
+
+
+async def run_session(scripted: ScriptedConsole) -> SessionResult:
+    """
+    Runs a whole session (title, init and main menu) using
+    the scripted console until the user exits or the
+    script runs out
+
+    :param scripted: The console to run the session with
+    :return: The measurements of the session
+    """
+    # Imported here so the screens are only loaded when they are used
+    import main
+    previous: Console = console.set_console(scripted)
+    start: float = perf_counter()
+    try:
+        await main.main(main.Session())
+    except EndOfScript:
+        pass  # The script ran out so the session is over
+    finally:
+        scripted.flush()  # Write out the last screen
+        console.set_console(previous)
+    return SessionResult(scripted.screens, scripted.keystrokes, perf_counter() - start)
+
+
+async def run_sessions(events: List[Tuple[float, str]], sink: TextIO or None, realtime: bool,
+                       repeat: int) -> SessionResult:
+    """
+    Replays the same events as multiple sessions one after another
+
+    :param events: The recorded (time, input) events
+    :param sink: Where the output is written to (None discards it)
+    :param realtime: Whether or not to wait for the recorded time before each line
+    :param repeat: The number of sessions to run
+    :return: The combined measurements of the sessions
+    """
+    screens: int = 0
+    keystrokes: int = 0
+    seconds: float = 0
+    for _ in range(repeat):
+        result: SessionResult = await run_session(ReplayConsole(events, sink, realtime))
+        screens += result.screens
+        keystrokes += result.keystrokes
+        seconds += result.seconds
+    return SessionResult(screens, keystrokes, seconds)
+
+
+def run() -> NoReturn:
+    """
+    Runs the driver from the command line
+    """
+    parser: ArgumentParser = ArgumentParser(description='Runs sessions from a script or recording')
+    parser.add_argument('script', nargs='?', help='A file with one line of input per line')
+    parser.add_argument('--replay', help='A recording to replay instead of a script')
+    parser.add_argument('--realtime', action='store_true', help='Replay at the recorded speed')
+    parser.add_argument('--record', help='Record an interactive session to this file')
+    parser.add_argument('--repeat', type=int, default=1, help='The number of times to run the session')
+    parser.add_argument('--show', action='store_true', help='Display the output instead of discarding it')
+    args = parser.parse_args()
+
+    if args.record:
+        # Record a real session typed by the user
+        with open(args.record, 'w') as file:
+            console.set_console(RecordingConsole(file))
+            try:
+                import main
+                asyncio.run(main.main(main.Session()))
+            except EOFError:
+                pass
+            finally:
+                console.flush()
+        return
+
+    events: List[Tuple[float, str]]
+    if args.replay:
+        with open(args.replay) as file:
+            events = load_recording(file)
+    elif args.script:
+        with open(args.script) as file:
+            events = [(0, line.rstrip('\n')) for line in file]
+    else:
+        parser.error('A script or a recording to replay is required')
+        return
+
+    # Only display the output if asked to so that it doesn't slow down the session
+    sink: TextIO or None = sys.stdout if args.show else None
+
+    total: SessionResult = asyncio.run(run_sessions(events, sink, args.realtime, args.repeat))
+    print(f'Sessions: {args.repeat}')
+    print(f'Screens: {total.screens} ({total.screens_per_second():,.0f} per second)')
+    print(f'Keystrokes: {total.keystrokes}')
+    print(f'Time: {total.seconds:.4f}s ({total.seconds / args.repeat * 1000:.3f}ms per session)')
+
+
+if __name__ == '__main__':
+    run()
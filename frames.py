@@ -0,0 +1,84 @@
+import marshal
+import os
+from typing import Callable, Dict, Iterable, NoReturn
+
+
+class FrameCache:
+    path: str  # The path of the cache file
+    key: tuple  # What the frames were built from (frames built from anything else are thrown away)
+    frames: Dict[str, str]  # The text of each frame by name
+    changed: bool  # Whether or not frames were built since the cache file was loaded
+
+    def __init__(self, path: str, key: tuple) -> None:
+        """
+        A cache file of the screens that never change (e.g the title and
+        the menu listing) so a new till can write them without building
+        them first. The cache is only used if it was built from the same
+        key (e.g the same program version and menu file)
+
+        :param path: The path of the cache file
+        :param key: What the frames are built from
+        """
+        self.path = path
+        self.key = key
+        self.frames = {}
+        self.changed = False
+        try:
+            with open(path, 'rb') as file:
+                stored_key, frames = marshal.loads(file.read())
+            if stored_key == key:
+                self.frames = frames
+        except (OSError, EOFError, ValueError, TypeError):
+            pass  # There is no cache yet or it can't be read
+
+    def get(self, name: str, build: Callable[[], str]) -> str:
+        """
+        Finds a frame, building it if it isn't cached yet
+
+        :param name: The name of the frame
+        :param build: Builds the frame
+        :return: The text of the frame
+        """
+        frame: str or None = self.frames.get(name)
+        if frame is None:
+            frame = self.frames[name] = build()
+            self.changed = True
+        return frame
+
+    def save(self) -> NoReturn:
+        """
+        Writes the frames to the cache file if any were built. Failing
+        to write is ignored as the frames can always be built again
+        """
+        if not self.changed:
+            return
+        temporary: str = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(temporary, 'wb') as file:
+                marshal.dump((self.key, self.frames), file)
+            os.replace(temporary, self.path)
+            self.changed = False
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+
+def source_key(paths: Iterable[str]) -> tuple:
+    """
+    Finds the modified time and size of each source file the frames are
+    rendered by, so editing the code that renders them (e.g the prompts
+    or the menu layout) throws the cached frames away
+
+    :param paths: The paths of the source files
+    :return: The modified time and size of each file (None if it can't be found)
+    """
+    key: list = []
+    for path in paths:
+        try:
+            stat: os.stat_result = os.stat(path)
+            key.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            key.append(None)
+    return tuple(key)
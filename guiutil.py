@@ -1,9 +1,15 @@
 import os
+import re
+from functools import lru_cache
 from math import floor
-from re import sub
+from re import Pattern
 from sys import platform
-from typing import List, Dict, NoReturn
+from typing import Callable, Iterable, List, Dict, NoReturn, Tuple
 
+from console import write
+from menu import MenuIndex
+from metrics import timed
+from money import format_cents, to_cents, scoops_price, to_tenths
 from order import Order
 
 # Box drawing chars
@@ -26,6 +32,13 @@ COLOR_END: str = '\033[0m'  # Clears the current terminal color
 
 BOX_WIDTH: int = 78  # The width that boxes should be (this excludes the sides -2)
 
+NUMBER_PATTERN: Pattern = re.compile(r'([$]*[0-9]+[.]?[0-9]*)')  # Matches numbers and prices
+QUOTE_PATTERN: Pattern = re.compile(r'"(.*)"')  # Matches quoted text
+NUMBER_COLOR: str = COLOR_YELLOW + r'\1' + COLOR_END  # Surrounds a matched number with yellow
+QUOTE_COLOR: str = COLOR_YELLOW + r'"\1"' + COLOR_END  # Surrounds matched quoted text with yellow
+PROMPT_CACHE_SIZE: int = 256  # The maximum amount of created prompts to keep
+MENU_PAGE_SIZE: int = 20  # The amount of items on each page of the menu
+
 if os.name == 'nt':
     # Fixes color codes on windows
     os.system('')
@@ -38,7 +51,7 @@ def error(text: str) -> NoReturn:
 
     :param text: The error text contents
     """
-    print(COLOR_RED + text + COLOR_END)
+    write(COLOR_RED + text + COLOR_END)
 
 
 def good(text: str) -> NoReturn:
@@ -49,7 +62,7 @@ def good(text: str) -> NoReturn:
 
     :param text: The text contents
     """
-    print(COLOR_GREEN + text + COLOR_END)
+    write(COLOR_GREEN + text + COLOR_END)
 
 
 def center(text: str, columns: int = BOX_WIDTH) -> str:
@@ -106,21 +119,36 @@ def create_title(text: str, extra_width: int = 0) -> str:
     return BOX_V + padded + BOX_V + '\n'
 
 
-def format_price(price: float) -> str:
+def format_price(price: int) -> str:
     """
-    Uses string formatting to format a float
-    value as a currency (takes the first 2 decimal places e.g $4.00)
+    Formats an amount of cents as a currency (e.g $4.00)
 
-    :param price: The float price value
+    :param price: The price in cents
     :return: The formatting string value
     """
-    return '${:,.2f}'.format(price)
+    return format_cents(price)
 
 
-def create_prompt(lines: List[str]) -> str:
+def colorize(line: str) -> str:
     """
-    Creates a prompt message with the provided lines
-    (Used to tell the user what information we want)
+    Surrounds the numbers and quoted text in
+    a line with yellow
+
+    :param line: The line to colorize
+    :return: The colorized line
+    """
+    # Regex replace all numbers and surround them with yellow
+    line = NUMBER_PATTERN.sub(NUMBER_COLOR, line)
+    # Regex replace all quoted text and surround them with yellow
+    return QUOTE_PATTERN.sub(QUOTE_COLOR, line)
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+@timed  # Only measures the prompts that weren't already cached
+def build_prompt(lines: Tuple[str, ...]) -> str:
+    """
+    Creates a prompt message with the provided lines. The
+    result is cached so the same prompt is only built once
 
     :param lines: The lines to put into the prompt
     :return: The created prompt
@@ -130,17 +158,73 @@ def create_prompt(lines: List[str]) -> str:
     # The current line we a printing
     line: str
     for line in lines:
-        # Regex replace all numbers and surround them with yellow
-        line = sub(r'([$]*[0-9]+[.]?[0-9]*)', f'{COLOR_YELLOW}\\{1}{COLOR_END}', line)
-        # Regex replace all quoted text and surround them with yellow
-        line = sub(r'"(.*)"', f'{COLOR_YELLOW}"\\{1}"{COLOR_END}', line)
-        # Append the line to the output
-        output += f'{BOX_V} {line}\n'
+        # Append the colorized line to the output
+        output += f'{BOX_V} {colorize(line)}\n'
     # Append the arrow for user input
     output += f': {ARROW} '
     return output
 
 
+def create_prompt(lines: List[str]) -> str:
+    """
+    Creates a prompt message with the provided lines
+    (Used to tell the user what information we want)
+
+    :param lines: The lines to put into the prompt
+    :return: The created prompt
+    """
+    return build_prompt(tuple(lines))
+
+
+class PromptTemplate:
+    template: str  # The created prompt with {} where each value goes
+
+    def __init__(self, lines: List[str]) -> None:
+        """
+        A prompt that is only built once but contains values
+        that change (e.g the amount of fish remaining). The
+        lines use {} for where each value is placed
+
+        :param lines: The lines to put into the prompt
+        """
+        self.template = build_prompt(tuple(lines))
+
+    def format(self, *values: object) -> str:
+        """
+        Creates the prompt with the provided values, only the
+        values need to be colorized as the rest is already built
+
+        :param values: The values to place into the prompt
+        :return: The created prompt
+        """
+        return self.template.format(*(colorize(str(value)) for value in values))
+
+
+@lru_cache(maxsize=None)
+def box_lines(width: int) -> Tuple[str, str, str]:
+    """
+    Creates the top, splitter and bottom lines of a box. These
+    are only created once for each width and then reused
+
+    :param width: The width of the box (this excludes the sides)
+    :return: The top line, the splitter line and the bottom line
+    """
+    line: str = BOX_H * width
+    return BOX_CTL + line + BOX_CTR + '\n', BOX_SVL + line + BOX_SVR + '\n', BOX_CBL + line + BOX_CBR
+
+
+# The lines of a box with the default width (the bottom has no new line)
+BOX_TOP, BOX_SPLITTER, BOX_BOTTOM = box_lines(BOX_WIDTH)
+
+# The titles that never change are only created once
+TITLE_FISH: str = create_title('Fish (Quantity):')  # The title above the fish in an order
+TITLE_CHIPS: str = create_title('Chips (Scoops):')  # The title above the chips in an order
+TITLE_NO_ITEMS: str = create_title('No Items')  # The title shown when an order is empty
+
+# Something that accepts each piece of rendered text (e.g file.write or list.append)
+Sink = Callable[[str], object]
+
+
 def splitter() -> str:
     """
     Creates a divider with splits on the vertical axis
@@ -148,7 +232,7 @@ def splitter() -> str:
 
     :return: The splitter
     """
-    return BOX_SVL + (BOX_H * BOX_WIDTH) + BOX_SVR + '\n'
+    return BOX_SPLITTER
 
 
 def item_padded(text: str) -> str:
@@ -162,15 +246,42 @@ def item_padded(text: str) -> str:
     return BOX_V + pad_right(text, BOX_WIDTH) + BOX_V + '\n'
 
 
-def create_menu(types: List[Dict[str, float or str]]) -> str:
+def write_section_title(menu_type: Dict[str, float or str], price: int, sink: Sink) -> NoReturn:
     """
-    Creates a string representation of the menu
+    Renders the name and price titles of a menu section
+
+    :param menu_type: The type of the section
+    :param price: The price of the items in the section in cents
+    :param sink: Accepts each piece of the titles
+    """
+    price_text: str = format_price(price)
+
+    # If the price has a custom format we should
+    # apply that here
+    if 'price_format' in menu_type:
+        price_text = menu_type['price_format'].format(price_text)
+
+    # Append the yellow color and the reset color to the price text
+    price_text = COLOR_YELLOW + price_text + COLOR_END
+    # The length of the reset char and the yellow char (they don't take up any space)
+    formatting_length: int = len(COLOR_YELLOW) + len(COLOR_END)
+
+    # Write the name title
+    sink(create_title(menu_type['name']))
+    # Write the price title
+    sink(create_title(price_text, formatting_length))
+
+
+@timed
+def write_menu(types: List[Dict[str, float or str]], sink: Sink) -> NoReturn:
+    """
+    Renders the menu piece by piece into the sink so that
+    the menu is never copied while its being built
 
     :param types: The types of the menu
-    :return: The string representation of the menu
+    :param sink: Accepts each piece of the menu
     """
-    # The output string containing the menu
-    output: str = BOX_CTL + (BOX_H * BOX_WIDTH) + BOX_CTR + '\n'
+    sink(BOX_TOP)
     # The current index of the item
     index: int = 0
     # Whether or not this is the first section being added
@@ -181,160 +292,296 @@ def create_menu(types: List[Dict[str, float or str]]) -> str:
         else:
             # If this is not the first section we add a divider
             # with left and right splits
-            output += BOX_SVL + (BOX_H * BOX_WIDTH) + BOX_SVR + '\n'
-
-        name: str = menu_type['name']  # The name of the section
-        price: float = menu_type['price']  # The price of the items in this section
-
-        price_text: str = format_price(price)
-        formatting_length: int = 0
-
-        # If the price has a custom format we should
-        # apply that here
-        if 'price_format' in menu_type:
-            price_text = menu_type['price_format'].format(price_text)
+            sink(BOX_SPLITTER)
 
-        # Append the yellow color and the reset color to the price text
-        price_text = COLOR_YELLOW + price_text + COLOR_END
-        # Set the length of the formatting to the length
-        # of the reset char and the yellow char
-        formatting_length = len(COLOR_YELLOW) + len(COLOR_END)
-
-        # Appending the name title to the output
-        output += create_title(name)
-        # Appending the price title to the output
-        output += create_title(price_text, formatting_length)
+        # Write the name and price titles
+        write_section_title(menu_type, to_cents(menu_type['price']), sink)
 
         # Split the title and the content using a divider
         # with left and right splits
-        output += BOX_SVL + (BOX_H * BOX_WIDTH) + BOX_SVR + '\n'
+        sink(BOX_SPLITTER)
 
         # Ensure that this sections has items (fish not chips)
         if 'items' in menu_type:
             # The item inside the section
             items: List[str] = menu_type['items']
             for item in items:
-                # Format the item with it's index and name
-                item = f'{index + 1}) {item}'
-                # Append the item to the output
-                output += item_padded(' ' + item)
+                # Write the item with it's index and name
+                sink(item_padded(f' {index + 1}) {item}'))
                 index += 1  # Increase the index
         elif 'text' in menu_type:
             # This section doesn't have any items but it has a
             # message so this will be its object
-            item_text = f'{index + 1}) {menu_type["text"]}'
-            # Append the text to the output
-            output += item_padded(' ' + item_text)
+            sink(item_padded(f' {index + 1}) {menu_type["text"]}'))
             index += 1  # Increase the index
 
-    # Append the bottom of the box
-    output += BOX_CBL + (BOX_H * BOX_WIDTH) + BOX_CBR
-    return output
+    # Write the bottom of the box
+    sink(BOX_BOTTOM)
+
+
+def menu_pages(menu: MenuIndex, page_size: int = MENU_PAGE_SIZE) -> int:
+    """
+    :param menu: The compiled menu index
+    :param page_size: The amount of items on each page
+    :return: The amount of pages the menu takes up
+    """
+    return max(1, -(-menu.total_items // page_size))
 
 
-def get_item_price(types: List[dict], item_name: str, is_name: bool) -> float:
+def section_page(menu: MenuIndex, section: int, page_size: int = MENU_PAGE_SIZE) -> int:
+    """
+    :param menu: The compiled menu index
+    :param section: The index of the type section
+    :param page_size: The amount of items on each page
+    :return: The page (starting at 0) the section starts on
+    """
+    return (menu.section_starts[section] - 1) // page_size
+
+
+@timed
+def write_menu_page(menu: MenuIndex, page: int, sink: Sink, page_size: int = MENU_PAGE_SIZE) -> NoReturn:
+    """
+    Renders a single page of the menu. Only the items on the page are
+    looked at so a page takes the same time no matter how big the menu
+    is. The items are numbered with the same ordinals as the whole menu
+
+    :param menu: The compiled menu index
+    :param page: The page to render (starting at 0)
+    :param sink: Accepts each piece of the page
+    :param page_size: The amount of items on each page
+    """
+    first: int = page * page_size + 1  # The ordinal of the first item on the page
+    last: int = min(first + page_size - 1, menu.total_items)  # The ordinal of the last item on the page
+    sink(BOX_TOP)
+    sink(create_title(f'Menu (Page {page + 1} of {menu_pages(menu, page_size)})'))
+    # The section of the last item written (a new section gets its titles first)
+    section: int = -1
+    for ordinal in range(first, last + 1):
+        item_section: int = menu.ordinal_sections[ordinal - 1]
+        menu_type: Dict[str, float or str] = menu.types[item_section]
+        if item_section != section:
+            section = item_section
+            sink(BOX_SPLITTER)
+            write_section_title(menu_type, menu.type_prices[menu_type['name']], sink)
+            sink(BOX_SPLITTER)
+        if 'items' in menu_type:
+            sink(item_padded(f' {ordinal}) {menu.ordinals[ordinal - 1]}'))
+        else:
+            # This section doesn't have any items so its text is shown instead
+            sink(item_padded(f' {ordinal}) {menu_type["text"]}'))
+    sink(BOX_BOTTOM)
+
+
+def create_menu_page(menu: MenuIndex, page: int, page_size: int = MENU_PAGE_SIZE) -> str:
+    """
+    Creates a string representation of a single page of the menu
+
+    :param menu: The compiled menu index
+    :param page: The page to render (starting at 0)
+    :param page_size: The amount of items on each page
+    :return: The string representation of the page
+    """
+    pieces: List[str] = []
+    write_menu_page(menu, page, pieces.append, page_size)
+    return ''.join(pieces)
+
+
+def create_item_list(title: str, items: List[Tuple[int, str]]) -> str:
+    """
+    Creates a box listing some of the items on the menu
+    (e.g the matches of a search) with their ordinals
+
+    :param title: The title of the box
+    :param items: The ordinal and name of each item
+    :return: The string representation of the items
+    """
+    pieces: List[str] = [BOX_TOP, create_title(title), BOX_SPLITTER]
+    for ordinal, name in items:
+        pieces.append(item_padded(f' {ordinal}) {name}'))
+    pieces.append(BOX_BOTTOM)
+    return ''.join(pieces)
+
+
+def create_menu(types: List[Dict[str, float or str]]) -> str:
+    """
+    Creates a string representation of the menu
+
+    :param types: The types of the menu
+    :return: The string representation of the menu
+    """
+    # The pieces are joined once at the end instead of copying the output for every line
+    pieces: List[str] = []
+    write_menu(types, pieces.append)
+    return ''.join(pieces)
+
+
+def get_item_price(menu: MenuIndex, item_name: str, is_name: bool) -> int:
     """
     Finds the price of the specified item
 
-    :param types: The menu type sections
+    :param menu: The compiled menu index
     :param item_name: The name of the item
     :param is_name: If true then the item name is a name not an item
-    :return: The price or 0 if not found
-    """
-    for menu_type in types:
-        # The name of the menu item
-        name: str = menu_type['name']
-        # The price of these items
-        price: float = menu_type['price']
-        # If we are searching for type names and it matches
-        if is_name and name == item_name:
-            return price  # Return the price
-        # Otherwise if this type has items and its in the items
-        elif 'items' in menu_type and item_name in menu_type['items']:
-            return price  # Return the price
-    # Not found so return 0
-    return 0
-
-
-def create_order_list(order: Order, types: List[dict]) -> str:
+    :return: The price in cents or 0 if not found
     """
-    Creates a string representation of an order
+    return menu.get_price(item_name, is_name)
 
-    :param types: The type sections of the menu
-    :param order: The order object
-    :return: The string representation of the order
+
+# A fish line of a receipt is the fish type, the amount and the price of the line
+# and a chips line is the amount of scoops and the price of the line (the price is
+# None when it isn't known e.g orders journaled before the prices were recorded)
+FishLine = Tuple[str, int, int or None]
+ChipsLine = Tuple[float, int or None]
+
+
+def write_receipt(sink: Sink, order_id: str, name: str, phone: str, address: str or None, frozen: bool,
+                  fish: Iterable[FishLine], chips: Iterable[ChipsLine], delivery_charge: int or None,
+                  prices: Tuple[int, int, int, int] or None) -> NoReturn:
     """
-    # The output string containing the order list
-    output: str = BOX_CTL + (BOX_H * BOX_WIDTH) + BOX_CTR + '\n'
+    Renders a receipt piece by piece into the sink, this is shared by
+    orders being taken and orders recorded in the journal
+
+    :param sink: Accepts each piece of the receipt
+    :param order_id: The display id of the order
+    :param name: The customer name
+    :param phone: The customer phone
+    :param address: The delivery address (None if it isn't being delivered)
+    :param frozen: Whether or not the order is frozen
+    :param fish: The fish lines
+    :param chips: The chips lines
+    :param delivery_charge: The delivery charge in cents (None if there isn't one or it isn't known)
+    :param prices: The frozen discount, total, gst and gst inclusive total in cents (None if the order is empty)
+    """
+    sink(BOX_TOP)
     # The current index of the item
     index: int = 0
 
-    # Append the order id
-    output += create_title('Order # ' + order.order_id) + splitter()
-    # Append the customer name
-    output += item_padded(' Name: ' + order.name)
-    # Append the customer phone
-    output += item_padded(' Phone: ' + order.phone)
+    # Write the order id
+    sink(create_title('Order # ' + order_id))
+    sink(BOX_SPLITTER)
+    # Write the customer name
+    sink(item_padded(' Name: ' + name))
+    # Write the customer phone
+    sink(item_padded(' Phone: ' + phone))
 
-    if order.delivery:  # If the customer is getting it delivered
-        # Append the customer address
-        output += item_padded(' Address: ' + order.address)
+    if address is not None:  # If the customer is getting it delivered
+        # Write the customer address
+        sink(item_padded(' Address: ' + address))
 
-    if order.frozen:  # If the customer wants it frozen
-        # Append the message "Frozen Order Discount" indicting there is a discount
-        output += item_padded(' Frozen Order Discount')
+    if frozen:  # If the customer wants it frozen
+        # Write the message "Frozen Order Discount" indicting there is a discount
+        sink(item_padded(' Frozen Order Discount'))
 
-    if order.empty():
+    if prices is None:
         # If we have an empty order tell the user
-        output += splitter() + create_title('No Items')
+        sink(BOX_SPLITTER)
+        sink(TITLE_NO_ITEMS)
 
     else:
-        # If we have fish in our order
-        if len(order.fish) > 0:
-            # Append the title
-            output += splitter() + create_title('Fish (Quantity):') + splitter()
-
-            for fish in order.fish:
-                amount: int = order.fish[fish]  # The amount of fish
-                # Find the price of this fish type then times it by how many we have
-                price: float = get_item_price(types, fish, False) * amount
-                # Append the fish item
-                output += item_padded(f' {index + 1}) {fish} {amount} - {format_price(price)}')
-                index += 1  # Increase the index
+        for fish_type, amount, price in fish:
+            if index == 0:  # The title is written above the first fish
+                sink(BOX_SPLITTER)
+                sink(TITLE_FISH)
+                sink(BOX_SPLITTER)
+            # Write the fish item
+            if price is None:
+                sink(item_padded(f' {index + 1}) {fish_type} {amount}'))
+            else:
+                sink(item_padded(f' {index + 1}) {fish_type} {amount} - {format_price(price)}'))
+            index += 1  # Increase the index
 
-        # If we have chips in our order
-        if len(order.chips) > 0:
+        first_chips: int = index
+        for scoops, price in chips:
+            if index == first_chips:  # The title is written above the first chips
+                sink(BOX_SPLITTER)
+                sink(TITLE_CHIPS)
+                sink(BOX_SPLITTER)
+            # Write the chips item
+            if price is None:
+                sink(item_padded(f' {index + 1}) {scoops} scoops'))
+            else:
+                sink(item_padded(f' {index + 1}) {scoops} scoops - {format_price(price)}'))
+            index += 1  # Increase the index
 
-            # Append the title
-            output += splitter() + create_title('Chips (Scoops):') + splitter()
+        frozen_discount, total_price, total_gst, total_inc_gst = prices
 
-            # Find the price of chips
-            price: float = get_item_price(types, 'Chips', True)
+        sink(BOX_SPLITTER)  # Write a splitter
 
-            for chips in order.chips:
-                # Append the chips item
-                output += item_padded(f' {index + 1}) {chips} scoops - {format_price(price * chips)}')
-                index += 1  # Increase the index
+        if delivery_charge is not None:  # If the order is delivery
+            # Write the cost for delivery
+            sink(item_padded(' DELIVERY: ' + format_price(delivery_charge)))
+        if frozen:  # If the order is frozen
+            # Write the amount taken away by the frozen discount
+            sink(item_padded(' DISCOUNT: ' + format_price(frozen_discount)))
 
-        # Calculate the prices
-        frozen_discount, total_price, total_gst, total_inc_gst = order.calculate_prices(types)
+        # Write the total cost (after delivery and discount)
+        sink(item_padded(' TOTAL: ' + format_price(total_price)))
+        # Write the total amount of GST
+        sink(item_padded(' TOTAL GST: ' + format_price(total_gst)))
+        # Write the total inclusive of GST
+        sink(item_padded(' TOTAL INC GST: ' + format_price(total_inc_gst)))
 
-        output += splitter()  # Append a splitter
+    # Write the bottom of the box
+    sink(BOX_BOTTOM)
 
-        if order.delivery:  # If the order is delivery
-            # Append the cost for delivery
-            output += item_padded(' DELIVERY: ' + format_price(order.delivery_charge))
-        if order.frozen:  # If the order is frozen
-            # Append the amount taken away by the frozen discount
-            output += item_padded(' DISCOUNT: ' + format_price(frozen_discount))
 
-        # Append the total cost (after delivery and discount)
-        output += item_padded(' TOTAL: ' + format_price(total_price))
-        # Append the total amount of GST
-        output += item_padded(' TOTAL GST: ' + format_price(total_gst))
-        # Append the total inclusive of GST
-        output += item_padded(' TOTAL INC GST: ' + format_price(total_inc_gst))
+@timed
+def write_order_list(order: Order, menu: MenuIndex, sink: Sink) -> NoReturn:
+    """
+    Renders an order piece by piece into the sink so that
+    large orders are never copied while they're being built
 
-    # Append the bottom of the box
-    output += BOX_CBL + BOX_H * BOX_WIDTH + BOX_CBR
-    return output
+    :param order: The order object
+    :param menu: The compiled menu index
+    :param sink: Accepts each piece of the order
+    """
+    # Find the price of chips
+    chips_price: int = get_item_price(menu, 'Chips', True)
+    write_receipt(
+        sink, order.order_id, order.name, order.phone,
+        order.address if order.delivery else None, order.frozen,
+        # Find the price of each fish type then times it by how many we have
+        ((fish, amount, get_item_price(menu, fish, False) * amount) for fish, amount in order.fish_items()),
+        ((chips, scoops_price(chips_price, to_tenths(chips))) for chips in order.chips),
+        order.config.delivery_charge if order.delivery else None,
+        None if order.empty() else order.calculate_prices()
+    )
+
+
+@timed
+def write_record_list(record: dict, sink: Sink) -> NoReturn:
+    """
+    Renders a journaled order from what was recorded when it was finished,
+    so the receipt shows what was charged even if the menu has changed since
+
+    :param record: The order record from the journal
+    :param sink: Accepts each piece of the order
+    """
+    prices: Dict[str, int] = record.get('prices', {})  # The price of each fish type that was charged
+    chips_price: int or None = record.get('chips_price')  # The price of a scoop of chips that was charged
+    fish: Dict[str, int] = record['fish']
+    chips: List[float] = record['chips']
+    write_receipt(
+        sink, record['order_id'], record['name'], record['phone'],
+        record.get('address') if record['delivery'] else None, record['frozen'],
+        ((fish_type, amount, prices[fish_type] * amount if fish_type in prices else None)
+         for fish_type, amount in fish.items()),
+        ((scoops, None if chips_price is None else scoops_price(chips_price, to_tenths(scoops)))
+         for scoops in chips),
+        record.get('delivery_charge') if record['delivery'] else None,
+        (record['discount'], record['total'], record['gst'], record['total_inc_gst']) if fish or chips else None
+    )
+
+
+def create_order_list(order: Order, menu: MenuIndex) -> str:
+    """
+    Creates a string representation of an order
+
+    :param menu: The compiled menu index
+    :param order: The order object
+    :return: The string representation of the order
+    """
+    # The pieces are joined once at the end instead of copying the output for every line
+    pieces: List[str] = []
+    write_order_list(order, menu, pieces.append)
+    return ''.join(pieces)
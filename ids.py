@@ -0,0 +1,226 @@
+import os
+from threading import Lock
+from time import time
+from typing import List, NoReturn
+
+from locking import lock_file
+
+EPOCH: int = 1609459200000  # The milliseconds the ids count from (2021-01-01 UTC)
+SHARD_BITS: int = 10  # The bits used for the shard (up to 1024 processes)
+SEQUENCE_BITS: int = 12  # The bits used for the sequence (up to 4096 ids per millisecond per shard)
+MAX_SHARD: int = (1 << SHARD_BITS) - 1  # The largest shard
+MAX_SEQUENCE: int = (1 << SEQUENCE_BITS) - 1  # The largest sequence
+DISPLAY_ALPHABET: str = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'  # Crockford base32 (no I, L, O or U)
+
+
+class OrderIdGenerator:
+    shard: int  # The shard of this generator (each process needs a different shard)
+    last_time: int  # The millisecond the last id was made in
+    sequence: int  # The sequence of the last id within its millisecond
+    lock: Lock  # Makes sure two threads never get the same id
+
+    def __init__(self, shard: int) -> None:
+        """
+        Generates ids made from the time, the shard and a sequence so that
+        ids always increase and never collide between threads, processes
+        (using different shards) or restarts (the time has moved on)
+
+        :param shard: The shard of this generator (each process needs a different shard)
+        """
+        if shard < 0 or shard > MAX_SHARD:
+            raise ValueError('Shard must be between 0 and {}'.format(MAX_SHARD))
+        self.shard = shard
+        self.last_time = 0
+        self.sequence = 0
+        self.lock = Lock()
+
+    def next_id(self) -> int:
+        """
+        :return: The next unique id
+        """
+        with self.lock:
+            now: int = int(time() * 1000) - EPOCH
+            if now > self.last_time:
+                self.last_time = now
+                self.sequence = 0
+            else:
+                # Either the same millisecond or the clock went backwards, in
+                # both cases keep counting from the last time so ids never repeat
+                self.sequence += 1
+                if self.sequence > MAX_SEQUENCE:
+                    # Used up this millisecond so borrow the next one
+                    self.last_time += 1
+                    self.sequence = 0
+            return ((self.last_time << (SHARD_BITS + SEQUENCE_BITS))
+                    | (self.shard << SEQUENCE_BITS) | self.sequence)
+
+    def next_ids(self, count: int) -> List[int]:
+        """
+        Reserves a block of ids at once (ids within the same
+        millisecond are consecutive numbers so each block only
+        needs the lock once)
+
+        :param count: The amount of ids to reserve
+        :return: The reserved ids in increasing order
+        """
+        ids: List[int] = []
+        with self.lock:
+            while count > 0:
+                now: int = int(time() * 1000) - EPOCH
+                if now > self.last_time:
+                    self.last_time = now
+                    first: int = 0
+                else:
+                    first: int = self.sequence + 1
+                    if first > MAX_SEQUENCE:
+                        self.last_time += 1
+                        first = 0
+                # Take as many sequences as are left in this millisecond
+                last: int = min(first + count - 1, MAX_SEQUENCE)
+                base: int = (self.last_time << (SHARD_BITS + SEQUENCE_BITS)) | (self.shard << SEQUENCE_BITS)
+                ids.extend(range(base | first, (base | last) + 1))
+                self.sequence = last
+                count -= last - first + 1
+        return ids
+
+
+def display_id(order_id: int) -> str:
+    """
+    Creates the short form of an id for displaying on receipts
+    (Crockford base32 split into groups of 4 e.g 2K3M-9XQ0-4ZA)
+
+    :param order_id: The id to display
+    :return: The display form of the id
+    """
+    chars: list = []
+    while True:
+        order_id, remainder = divmod(order_id, 32)
+        chars.append(DISPLAY_ALPHABET[remainder])
+        if order_id == 0:
+            break
+    text: str = ''.join(reversed(chars))
+    return '-'.join(text[index:index + 4] for index in range(0, len(text), 4))
+
+
+def parse_id(display: str) -> int:
+    """
+    Converts the display form of an id back into the id
+
+    :param display: The display form of the id
+    :return: The id
+    """
+    order_id: int = 0
+    for char in display.replace('-', '').upper():
+        order_id = order_id * 32 + DISPLAY_ALPHABET.index(char)
+    return order_id
+
+
+def shard_directory() -> str:
+    """
+    :return: The directory the shard lock files are kept in (FFF_SHARD_DIR or a temporary directory)
+    """
+    if 'FFF_SHARD_DIR' in os.environ:
+        return os.environ['FFF_SHARD_DIR']
+    # Only imported when a shard is first needed so it doesn't slow down starting
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), 'fff-shards')
+
+
+def claim_shard(directory: str, shard: int) -> int or None:
+    """
+    Tries to take the lock file of a shard. The lock is held until this
+    process exits (the operating system releases it even after a crash)
+
+    :param directory: The directory the shard lock files are kept in
+    :param shard: The shard to claim
+    :return: The open lock file or None if another process holds the shard
+    """
+    handle: int = os.open(os.path.join(directory, 'shard-{}.lock'.format(shard)), os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        lock_file(handle)
+    except OSError:
+        os.close(handle)
+        return None
+    return handle
+
+
+def allocate_shard(forked: bool = False) -> int:
+    """
+    Picks a shard no other process on this machine is using. The FFF_SHARD
+    environment variable is claimed if it is set (tills on different
+    machines sharing a journal must each be given a different one),
+    otherwise the first free shard is claimed
+
+    :param forked: Whether this process was forked (it can't use the shard its parent holds)
+    :return: The shard
+    """
+    global shard_lock
+    directory: str = shard_directory()
+    os.makedirs(directory, exist_ok=True)
+    if shard_lock is not None:
+        # The lock file of the parent's shard (the parent keeps holding it)
+        os.close(shard_lock)
+        shard_lock = None
+    if 'FFF_SHARD' in os.environ:
+        shard: int = int(os.environ['FFF_SHARD'])
+        if shard < 0 or shard > MAX_SHARD:
+            raise ValueError('FFF_SHARD must be between 0 and {}'.format(MAX_SHARD))
+        shard_lock = claim_shard(directory, shard)
+        if shard_lock is not None:
+            return shard
+        if not forked:
+            raise RuntimeError('Shard {} (FFF_SHARD) is already used by another process'.format(shard))
+    for shard in range(MAX_SHARD + 1):
+        shard_lock = claim_shard(directory, shard)
+        if shard_lock is not None:
+            return shard
+    raise RuntimeError('All {} shards are used by other processes'.format(MAX_SHARD + 1))
+
+
+# The generator new orders get their ids from, it is only created when the first id is
+# needed (and again after a fork as the child can't share its parent's shard or sequence)
+generator: OrderIdGenerator or None = None
+shard_lock: int or None = None  # The open lock file of this process's shard
+forked: bool = False  # Whether this process was forked after its parent picked a shard
+
+
+def after_fork() -> NoReturn:
+    """
+    Throws away the generator inherited from the parent process
+    """
+    global generator, forked
+    if generator is not None:
+        generator = None
+        forked = True
+
+
+# Windows can't fork (each process starts fresh) so there is nothing to throw away there
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=after_fork)
+
+
+def get_generator() -> OrderIdGenerator:
+    """
+    :return: The generator new orders get their ids from (created the first time)
+    """
+    global generator
+    if generator is None:
+        generator = OrderIdGenerator(allocate_shard(forked))
+    return generator
+
+
+def set_generator(value: OrderIdGenerator) -> NoReturn:
+    """
+    Replaces the generator new orders get their ids from
+
+    :param value: The new generator
+    """
+    global generator
+    generator = value
+
+
+def next_order_id() -> str:
+    """
+    :return: The display form of the next order id
+    """
+    return display_id(get_generator().next_id())
@@ -0,0 +1,214 @@
+import json
+import sys
+from argparse import ArgumentParser
+from functools import lru_cache
+from typing import Iterable, Iterator, NoReturn, TextIO, Tuple
+
+from guiutil import write_order_list
+from input import BOOLEAN, FLOAT, INT, LIST, MAPPING, TEXT, Field, Schema, error_message
+from main import current_config
+from order import Order, OrderConfig
+
+# A stage item is the line number of the record along with
+# either its value or the message telling the user whats wrong
+Item = Tuple[int, object, str or None]
+
+
+def parse(lines: Iterable[str]) -> Iterator[Item]:
+    """
+    Parses each json line into a record skipping
+    any blank lines
+
+    :param lines: The json lines
+    :return: The parsed records
+    """
+    line_number: int = 0
+    for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue  # Skip blank lines
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, 'Invalid json: {}'.format(e)
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Order must be a json object'
+            continue
+        yield line_number, record, None
+
+
+CONFIG_BATCH: int = 1024  # The amount of records created with the same config before checking for a new menu
+EMPTY_ORDER_MESSAGE: str = 'The order is empty'  # The error for an order without any fish or chips
+SCHEMA_CACHE_SIZE: int = 4  # The amount of menu versions to keep order schemas for
+
+# The address is only checked when the order is being delivered
+DELIVERY_SCHEMA: Schema = Schema({'address': Field(TEXT, required=True, description='text')})
+
+
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def order_schema(config: OrderConfig) -> Schema:
+    """
+    Builds the schema an order record is checked against using the
+    same rules and limits as the interactive screens. The schema is
+    only built once for each config (each version of the menu)
+
+    :param config: The config the orders are created with
+    :return: The compiled schema
+    """
+    return Schema({
+        'name': Field(TEXT, required=True, description='text'),
+        'phone': Field(TEXT, required=True, description='text'),
+        'frozen': Field(BOOLEAN, default=False),
+        'delivery': Field(BOOLEAN, default=False),
+        'fish': Field(
+            MAPPING, default={}, values=frozenset(config.menu.item_types),
+            items=Field(INT, min_value=1, max_value=config.max_per_fish),
+            description='an object of fish types and amounts'
+        ),
+        'chips': Field(
+            LIST, default=[], max_items=config.max_amount_chips,
+            items=Field(FLOAT, min_value=0.1, max_value=config.max_scoops_chips),
+            description='a list of scoop amounts'
+        )
+    })
+
+
+def create_order(record: dict, config: OrderConfig) -> Tuple[Order or None, str or None]:
+    """
+    Validates an order record using the same rules and limits
+    as the interactive screens and creates the order from it.
+    Invalid records don't throw an exception as most of the
+    time spent on large imports would be spent handling them
+
+    :param record: The order record
+    :param config: The config to create the order with (found once for a whole batch of records)
+    :return: The created order or the message telling the user whats wrong
+    """
+    values, errors = order_schema(config).validate(record)
+    if not errors and values['delivery']:
+        address, errors = DELIVERY_SCHEMA.validate(record)
+        values.update(address)
+    if errors:
+        return None, error_message(errors[0])
+    if not values['fish'] and not values['chips']:
+        # The till won't finish an empty order so it can't be imported either
+        return None, EMPTY_ORDER_MESSAGE
+
+    order: Order = Order(config)
+    order.name = values['name']
+    order.phone = values['phone']
+    order.frozen = values['frozen']
+    order.delivery = values['delivery']
+    if order.delivery:
+        order.address = values['address']
+    for fish_type, amount in values['fish'].items():
+        order.add_fish(fish_type, amount)
+    for amount in values['chips']:
+        # Round to 1dp the same as the add screen
+        order.add_chips(round(amount, 1))
+    return order, None
+
+
+def validate(records: Iterable[Item]) -> Iterator[Item]:
+    """
+    Validates each record and creates its order
+
+    :param records: The parsed records
+    :return: The created orders
+    """
+    config: OrderConfig or None = None
+    validated: int = 0
+    for line_number, record, message in records:
+        if message is not None:
+            yield line_number, None, message
+            continue
+        if validated % CONFIG_BATCH == 0:
+            # Checking the menu file for changes is a system call so it's only done once per batch
+            config = current_config()
+        validated += 1
+        order, message = create_order(record, config)
+        yield line_number, order, message
+
+
+def price(orders: Iterable[Item]) -> Iterator[dict]:
+    """
+    Prices each order
+
+    :param orders: The created orders
+    :return: The result of each order
+    """
+    for line_number, order, message in orders:
+        if message is not None:
+            yield {'line': line_number, 'error': message}
+            continue
+        frozen_discount, total_price, total_gst, total_inc_gst = order.calculate_prices()
+        yield {
+            'line': line_number,
+            'order_id': order.order_id,
+            'discount': frozen_discount,
+            'total': total_price,
+            'gst': total_gst,
+            'total_inc_gst': total_inc_gst,
+            'order': order
+        }
+
+
+def emit(results: Iterable[dict], out: TextIO, receipts: bool) -> Tuple[int, int]:
+    """
+    Writes each result as soon as it is produced, either as
+    a json line (prices in cents) or as a printed receipt
+
+    :param results: The results of each order
+    :param out: Where to write the results
+    :param receipts: Whether to write receipts instead of json lines
+    :return: The number of orders accepted and rejected
+    """
+    accepted: int = 0
+    rejected: int = 0
+    for result in results:
+        order: Order or None = result.pop('order', None)
+        if order is None:
+            rejected += 1
+        else:
+            accepted += 1
+        if receipts and order is not None:
+            # Receipts are written straight to the output instead of being built first
+            write_order_list(order, order.config.menu, out.write)
+            out.write('\n')
+        else:
+            out.write(json.dumps(result) + '\n')
+    return accepted, rejected
+
+
+def ingest(lines: Iterable[str], out: TextIO, receipts: bool = False) -> Tuple[int, int]:
+    """
+    Streams json line orders through the pipeline one at a time
+    so the memory used doesn't depend on the amount of orders
+
+    :param lines: The json lines
+    :param out: Where to write the results
+    :param receipts: Whether to write receipts instead of json lines
+    :return: The number of orders accepted and rejected
+    """
+    return emit(price(validate(parse(lines))), out, receipts)
+
+
+def run() -> NoReturn:
+    """
+    Runs the ingestion from the command line
+    """
+    parser: ArgumentParser = ArgumentParser(description='Prices json line orders from a file or stdin')
+    parser.add_argument('file', nargs='?', help='The json lines file (defaults to stdin)')
+    parser.add_argument('--receipts', action='store_true', help='Write receipts instead of json lines')
+    args = parser.parse_args()
+    if args.file:
+        with open(args.file) as file:
+            accepted, rejected = ingest(file, sys.stdout, args.receipts)
+    else:
+        accepted, rejected = ingest(sys.stdin, sys.stdout, args.receipts)
+    sys.stderr.write(f'Accepted {accepted} orders, rejected {rejected}\n')
+
+
+if __name__ == '__main__':
+    run()
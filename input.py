@@ -1,8 +1,21 @@
-from typing import Callable, Any, List, NoReturn
+import math
+import re
+import sys
+from re import Pattern
+from typing import Callable, Any, Dict, FrozenSet, List, NoReturn, Tuple
+from console import read
 from guiutil import error
+from metrics import waiting_for_input
 
 BOOLEAN_YES: List[str] = ['y', 'yes', 't', 'true', '1']  # A list of the values that represent True
 BOOLEAN_NO: List[str] = ['n', 'no', 'f', 'false', '0']  # A list of the values that represent False
+BOOLEAN_TRUE: FrozenSet[str] = frozenset(BOOLEAN_YES)  # The values that represent True (for fast lookup)
+BOOLEAN_VALUES: FrozenSet[str] = frozenset(BOOLEAN_YES + BOOLEAN_NO)  # Every value that represents a boolean
+
+# Matches the text that int() and float() accept so numbers can be checked without catching exceptions
+INT_PATTERN: Pattern = re.compile(r'\s*[+-]?\d+\s*')
+FLOAT_PATTERN: Pattern = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*')
+FLOAT_LIMIT: float = sys.float_info.max  # The largest finite float (larger integers can't be converted)
 
 
 class ValidationError(Exception):
@@ -18,7 +31,7 @@ class ValidationError(Exception):
         self.message = message
 
 
-def accept(message: str, test: Callable[[str], Any]) -> str:
+async def accept(message: str, test: Callable[[str], Any]) -> str:
     """
     Accept a user input matching a test function
     Continues to display the message if invalid input
@@ -30,8 +43,10 @@ def accept(message: str, test: Callable[[str], Any]) -> str:
     # Looped so it will continue to prompt the user until
     # valid user input is provided
     while True:
-        # Retrieve the user input
-        user_input = input(message)
+        # Retrieve the user input (the time the user takes is measured
+        # separately so it doesn't count towards the screen's time)
+        with waiting_for_input():
+            user_input = await read(message)
         try:
             # Make sure there's actually input and not nothing
             if len(user_input) < 1:
@@ -46,7 +61,7 @@ def accept(message: str, test: Callable[[str], Any]) -> str:
             error(e.message)
 
 
-def accept_int(message: str, min_value: int, max_value: int) -> int:
+async def accept_int(message: str, min_value: int, max_value: int) -> int:
     """
     Accepts an integer from user input that is
     within the minimum and maximum values
@@ -57,7 +72,7 @@ def accept_int(message: str, min_value: int, max_value: int) -> int:
     :return: The integer value provided by the user
     """
     return int(
-        accept(
+        await accept(
             message,
             lambda value:  # Validation lambda function
             Validation.min_max(  # Validate that it is within the min and max
@@ -69,7 +84,7 @@ def accept_int(message: str, min_value: int, max_value: int) -> int:
     )
 
 
-def accept_float(message: str, min_value: float, max_value: float) -> float:
+async def accept_float(message: str, min_value: float, max_value: float) -> float:
     """
     Accepts a float from user input that is
     within the minimum and maximum values
@@ -80,7 +95,7 @@ def accept_float(message: str, min_value: float, max_value: float) -> float:
     :return: The float value provided by the user
     """
     return float(
-        accept(
+        await accept(
             message,
             lambda value:  # Validation lambda function
             Validation.min_max(  # Validate that it is within the min and max
@@ -92,7 +107,7 @@ def accept_float(message: str, min_value: float, max_value: float) -> float:
     )
 
 
-def accept_bool(message: str) -> bool:
+async def accept_bool(message: str) -> bool:
     """
     Accepts a boolean value from the user
     acceptable values are in BOOLEAN_YES
@@ -101,7 +116,7 @@ def accept_bool(message: str) -> bool:
     :param message: The message to display to the user
     :return: The boolean value provided by the user
     """
-    return accept(message, Validation.boolean) in BOOLEAN_YES
+    return (await accept(message, Validation.boolean)).lower() in BOOLEAN_TRUE
 
 
 class Validation:
@@ -156,6 +171,21 @@ class Validation:
             # Throw a validation exception because its not a valid int
             raise ValidationError('Provided input "{}" is not a valid number'.format(value))
 
+    @staticmethod
+    def is_int(value: str) -> bool:
+        """
+        Checks if the value is an integer
+        without throwing an exception
+
+        :param value: The value to check
+        :return: Whether or not the value is an integer
+        """
+        try:
+            int(value)
+            return True
+        except ValueError:
+            return False
+
     @staticmethod
     def float(value: str) -> float:
         """
@@ -203,8 +233,278 @@ class Validation:
         :return: The boolean value of the user input
         """
         value: str = value.lower()  # Convert to lowercase so that we ignore case
-        if value not in BOOLEAN_YES + BOOLEAN_NO:  # Check if the value is not in the lists
+        if value not in BOOLEAN_VALUES:  # Check if the value is not one of the boolean values
             # Throw a validation exception
             raise ValidationError('You must pick yes or no!')
-        # Return if its in the YES list or not
-        return value in BOOLEAN_YES
+        # Return if its one of the YES values or not
+        return value in BOOLEAN_TRUE
+
+
+# The kinds of value a schema field can hold
+TEXT: str = 'text'
+INT: str = 'int'
+FLOAT: str = 'float'
+BOOLEAN: str = 'boolean'
+MAPPING: str = 'mapping'  # An object of allowed keys each mapped to a value of the item field
+LIST: str = 'list'  # A list of values of the item field
+
+# The codes of the problems a schema can find with a field
+MISSING: str = 'missing'  # A required field wasn't provided or is empty
+WRONG_TYPE: str = 'wrong_type'  # The field isn't the kind of value it should be
+NOT_NUMBER: str = 'not_number'  # The field isn't a valid number
+NOT_BOOLEAN: str = 'not_boolean'  # The field isn't one of the boolean values
+NOT_ALLOWED: str = 'not_allowed'  # The field (or a key of it) isn't one of the allowed values
+TOO_SMALL: str = 'too_small'  # The number is less than the minimum
+TOO_LARGE: str = 'too_large'  # The number (or amount of items) is greater than the maximum
+
+# The message telling the user whats wrong for each error code. Each message is formatted with
+# the field name (e.g fish["Cod"] for an entry of a field), the value and what was expected of it
+ERROR_MESSAGES: Dict[str, str] = {
+    MISSING: 'Field "{0}" must be provided',
+    WRONG_TYPE: 'Field "{0}" must be {2}',
+    NOT_NUMBER: '{0}: Provided input "{1}" is not a valid number',
+    NOT_BOOLEAN: '{0}: You must pick yes or no!',
+    NOT_ALLOWED: 'Unknown {0} type "{1}"',
+    TOO_SMALL: '{0}: Number cannot be less than {2} you picked {1}',
+    TOO_LARGE: '{0}: Number cannot be greater than {2} you picked {1}',
+}
+
+# A field error is the name of the field, the error code,
+# the value that was wrong and what was expected of it
+FieldError = Tuple[str, str, Any, Any]
+# A compiled check takes the value and the field name, adds any
+# problems to the list of errors and returns the converted value
+Check = Callable[[Any, str, List[FieldError]], Any]
+
+ABSENT: object = object()  # Marks a field that isn't in the record
+
+
+def error_message(field_error: FieldError) -> str:
+    """
+    :param field_error: The field error
+    :return: The message telling the user whats wrong
+    """
+    name, code, value, expected = field_error
+    return ERROR_MESSAGES[code].format(name, value, expected)
+
+
+def parse_int(value: Any) -> int or None:
+    """
+    Converts a value to an integer without
+    throwing an exception if its not valid
+
+    :param value: The value to convert (a number or text)
+    :return: The integer value or None if its not an integer
+    """
+    if type(value) is int:  # Booleans are ints but aren't accepted as numbers
+        return value
+    if isinstance(value, str) and INT_PATTERN.fullmatch(value):
+        return int(value)
+    return None
+
+
+def parse_float(value: Any) -> float or None:
+    """
+    Converts a value to a float without
+    throwing an exception if its not valid
+
+    :param value: The value to convert (a number or text)
+    :return: The float value or None if its not a finite number
+    """
+    if type(value) is int:
+        # Integers too large for a float are out of range the same as infinity
+        value = float(value) if -FLOAT_LIMIT < value < FLOAT_LIMIT else math.inf
+    elif isinstance(value, str) and FLOAT_PATTERN.fullmatch(value):
+        value = float(value)  # Text like "1e999" overflows to infinity
+    elif type(value) is not float:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def name_entry(errors: List[FieldError], start: int, name: str, entry: str) -> NoReturn:
+    """
+    Names the errors of an entry of a field after the entry (e.g fish["Cod"])
+    so the message says which entry is wrong instead of just the field
+
+    :param errors: The errors found so far
+    :param start: The index of the first error of the entry
+    :param name: The name of the field
+    :param entry: The name of the entry
+    """
+    for index in range(start, len(errors)):
+        field_name, code, value, expected = errors[index]
+        errors[index] = (entry + field_name[len(name):], code, value, expected)
+
+
+class Field:
+    __slots__ = (
+        'kind', 'required', 'default', 'min_value', 'max_value',
+        'values', 'items', 'max_items', 'description'
+    )
+
+    kind: str  # The kind of value the field holds (e.g INT)
+    required: bool  # Whether or not the field must be provided
+    default: Any  # The value used if the field isn't provided
+    min_value: float or int or None  # The minimum acceptable number
+    max_value: float or int or None  # The maximum acceptable number
+    values: FrozenSet[str] or None  # The acceptable text values (or mapping keys)
+    items: 'Field or None'  # The field each item of a mapping or list is checked with
+    max_items: int or None  # The maximum amount of items in a mapping or list
+    description: str  # What the value should be (used when its the wrong type)
+
+    def __init__(self, kind: str, required: bool = False, default: Any = None,
+                 min_value: float or int or None = None, max_value: float or int or None = None,
+                 values: FrozenSet[str] or None = None, items: 'Field or None' = None,
+                 max_items: int or None = None, description: str = 'valid') -> None:
+        """
+        Describes what a field of a record must hold
+
+        :param kind: The kind of value the field holds (e.g INT)
+        :param required: Whether or not the field must be provided
+        :param default: The value used if the field isn't provided
+        :param min_value: The minimum acceptable number
+        :param max_value: The maximum acceptable number
+        :param values: The acceptable text values (or mapping keys)
+        :param items: The field each item of a mapping or list is checked with
+        :param max_items: The maximum amount of items in a mapping or list
+        :param description: What the value should be (used when its the wrong type)
+        """
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.min_value = min_value
+        self.max_value = max_value
+        self.values = values
+        self.items = items
+        self.max_items = max_items
+        self.description = description
+
+    def compile(self) -> Check:
+        """
+        Builds the check for this field. Only the checks the field
+        needs are built so checking a value doesn't have to look
+        at the rest of the field description again
+
+        :return: The compiled check
+        """
+        min_value: float or int or None = self.min_value
+        max_value: float or int or None = self.max_value
+        values: FrozenSet[str] or None = self.values
+        description: str = self.description
+
+        def check_range(number: float or int, name: str, errors: List[FieldError]) -> float or int or None:
+            if min_value is not None and number < min_value:
+                errors.append((name, TOO_SMALL, number, min_value))
+                return None
+            if max_value is not None and number > max_value:
+                errors.append((name, TOO_LARGE, number, max_value))
+                return None
+            return number
+
+        if self.kind == TEXT:
+            def check(value: Any, name: str, errors: List[FieldError]) -> str or None:
+                if not isinstance(value, str):
+                    errors.append((name, WRONG_TYPE, value, description))
+                    return None
+                if len(value) < 1:
+                    errors.append((name, MISSING, value, description))
+                    return None
+                if values is not None and value not in values:
+                    errors.append((name, NOT_ALLOWED, value, values))
+                    return None
+                return value
+
+        elif self.kind == INT or self.kind == FLOAT:
+            parse: Callable[[Any], float or int or None] = parse_int if self.kind == INT else parse_float
+            ranged: bool = min_value is not None or max_value is not None
+
+            def check(value: Any, name: str, errors: List[FieldError]) -> float or int or None:
+                number: float or int or None = parse(value)
+                if number is None:
+                    errors.append((name, NOT_NUMBER, value, description))
+                    return None
+                return check_range(number, name, errors) if ranged else number
+
+        elif self.kind == BOOLEAN:
+            def check(value: Any, name: str, errors: List[FieldError]) -> bool or None:
+                if value is True or value is False:
+                    return value
+                text: str = str(value).lower()
+                if text not in BOOLEAN_VALUES:
+                    errors.append((name, NOT_BOOLEAN, value, description))
+                    return None
+                return text in BOOLEAN_TRUE
+
+        elif self.kind == MAPPING or self.kind == LIST:
+            check_item: Check = self.items.compile()
+            max_items: int or None = self.max_items
+            container: type = dict if self.kind == MAPPING else list
+
+            def check(value: Any, name: str, errors: List[FieldError]) -> dict or list or None:
+                if type(value) is not container:
+                    errors.append((name, WRONG_TYPE, value, description))
+                    return None
+                if max_items is not None and len(value) > max_items:
+                    errors.append((name, TOO_LARGE, len(value), max_items))
+                    return None
+                failed: int = len(errors)
+                if container is list:
+                    result: list = [check_item(item, name, errors) for item in value]
+                    if len(errors) > failed:
+                        # The items are only checked one by one to find which were wrong once any are
+                        del errors[failed:]
+                        for index, item in enumerate(value):
+                            checked: int = len(errors)
+                            check_item(item, name, errors)
+                            if len(errors) > checked:
+                                name_entry(errors, checked, name, f'{name}[{index}]')
+                else:
+                    result: dict = {}
+                    for key, item in value.items():
+                        if values is not None and key not in values:
+                            errors.append((name, NOT_ALLOWED, key, values))
+                            continue
+                        checked: int = len(errors)
+                        result[key] = check_item(item, name, errors)
+                        if len(errors) > checked:
+                            name_entry(errors, checked, name, f'{name}["{key}"]')
+                return result if len(errors) == failed else None
+
+        else:
+            raise ValueError('Unknown field kind "{}"'.format(self.kind))
+        return check
+
+
+class Schema:
+    checks: List[Tuple[str, Check, bool, Any]]  # The name, compiled check, required and default of each field
+
+    def __init__(self, fields: Dict[str, Field]) -> None:
+        """
+        A compiled set of fields that whole records are checked against.
+        Checking a record never throws an exception, every problem found
+        is returned as an error code instead so large amounts of records
+        can be checked without the cost of exceptions
+
+        :param fields: The fields of the record by name (checked in this order)
+        """
+        self.checks = [(name, field.compile(), field.required, field.default) for name, field in fields.items()]
+
+    def validate(self, record: dict) -> Tuple[Dict[str, Any], List[FieldError]]:
+        """
+        Checks a record against the schema
+
+        :param record: The record to check
+        :return: The converted value of each field and the errors found (empty if the record is valid)
+        """
+        values: Dict[str, Any] = {}
+        errors: List[FieldError] = []
+        for name, check, required, default in self.checks:
+            value: Any = record.get(name, ABSENT)
+            if value is ABSENT:
+                if required:
+                    errors.append((name, MISSING, None, None))
+                else:
+                    values[name] = default
+                continue
+            values[name] = check(value, name, errors)
+        return values, errors
@@ -0,0 +1,315 @@
+import json
+import mmap
+import os
+from struct import Struct
+from threading import Event, RLock, Thread
+from time import monotonic, time
+from typing import Iterator, NoReturn, Tuple
+from zlib import crc32
+
+from locking import lock_file
+from order import Order
+
+MAGIC: bytes = b'FFFJ\x01\x00\x00\x00'  # The bytes at the start of every journal file (name and version)
+RECORD_HEADER: Struct = Struct('<II')  # The length and crc32 of the payload before every record
+DECODER: json.JSONDecoder = json.JSONDecoder()  # Decodes the records (they have no surrounding whitespace)
+
+
+class JournalLockedError(RuntimeError):
+
+    def __init__(self, path: str) -> None:
+        """
+        An exception used when another process is already writing to a journal
+
+        :param path: The path of the journal
+        """
+        super().__init__('The journal "{}" is already being written to by another process'.format(path))
+
+
+class JournalWriter:
+    file: object  # The journal file opened for appending
+    sync_every: int  # The amount of records to write before syncing to disk
+    sync_interval: float  # The most seconds to wait before syncing written records to disk
+    pending: int  # The amount of records written since the last sync
+    last_sync: float  # The time of the last sync
+    lock: RLock  # Stops the sync timer syncing while a record is being written
+    closing: Event  # Set when the journal is closed to stop the sync timer
+    timer: Thread or None  # Syncs the journal every interval (None if it wasn't started)
+
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 1.0) -> None:
+        """
+        An append only journal of finished orders. Records are
+        synced to disk in batches so that writing lots of orders
+        doesn't wait on the disk for every single one
+
+        :param path: The path of the journal file
+        :param sync_every: The amount of records to write before syncing to disk
+        :param sync_interval: The most seconds to wait before syncing written records to disk
+        """
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.pending = 0
+        self.last_sync = monotonic()
+        self.lock = RLock()
+        self.closing = Event()
+        self.timer = None
+        # Opened without truncating so a journal that another process is writing isn't touched
+        # (and in binary mode as windows would otherwise translate the newlines in the records)
+        self.file = open(os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o666), 'r+b')
+        try:
+            # Only one process can write a journal, otherwise each would write over the other's records
+            lock_file(self.file.fileno())
+        except OSError:
+            self.file.close()
+            raise JournalLockedError(path)
+        # The end of the last complete record (anything after it was torn by a crash)
+        valid_end: int = recover(path)
+        if valid_end == 0:  # A new journal
+            self.file.seek(0)
+            self.file.write(MAGIC)
+            valid_end = len(MAGIC)
+        self.file.truncate(valid_end)
+        self.file.seek(valid_end)
+
+    def append(self, payload: bytes) -> NoReturn:
+        """
+        Appends a record to the journal
+
+        :param payload: The bytes of the record
+        """
+        with self.lock:
+            self.file.write(RECORD_HEADER.pack(len(payload), crc32(payload)) + payload)
+            # Handed to the operating system straight away so the record survives the program crashing
+            self.file.flush()
+            self.pending += 1
+            if self.pending >= self.sync_every or monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+
+    def append_order(self, order: Order) -> NoReturn:
+        """
+        Appends a finished order to the journal
+
+        :param order: The finished order
+        """
+        record: dict = order.to_record()
+        record['time'] = time()  # The time the order was finished
+        self.append(json.dumps(record, separators=(',', ':')).encode())
+
+    def sync(self) -> NoReturn:
+        """
+        Makes sure all the written records are on disk
+        """
+        with self.lock:
+            if self.pending > 0:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.pending = 0
+            self.last_sync = monotonic()
+
+    def start_timer(self) -> NoReturn:
+        """
+        Syncs the journal every interval on a background thread so the
+        last orders before a quiet period don't wait for the next order
+        to be synced (a server syncs from its event loop instead)
+        """
+        def run() -> NoReturn:
+            while not self.closing.wait(self.sync_interval):
+                self.sync()
+
+        self.timer = Thread(target=run, name='journal-sync', daemon=True)
+        self.timer.start()
+
+    def close(self) -> NoReturn:
+        """
+        Syncs any remaining records and closes the journal
+        """
+        self.closing.set()
+        if self.timer is not None:
+            self.timer.join()
+        self.sync()
+        self.file.close()
+
+
+class JournalReader:
+    file: object  # The journal file opened for reading
+    map: mmap.mmap or None  # The memory map of the file (None when the file is empty)
+
+    def __init__(self, path: str) -> None:
+        """
+        Reads a journal by memory mapping it so that only
+        the parts being read are loaded into memory
+
+        :param path: The path of the journal file
+        """
+        self.file = open(path, 'rb')
+        size: int = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else None
+        if self.map is not None and self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('"{}" is not an order journal'.format(path))
+
+    def scan(self, start: int = len(MAGIC)) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Iterates the records without copying them. The views are only
+        valid until the reader is closed. Iteration stops at the first
+        incomplete or corrupt record (e.g one torn by a crash)
+
+        :param start: The offset to start reading from (the end of an earlier record)
+        :return: The offset of the end of each record and a view of its bytes
+        """
+        if self.map is None:
+            return
+        view: memoryview = memoryview(self.map)
+        try:
+            size: int = len(self.map)
+            offset: int = max(start, len(MAGIC))
+            while offset + RECORD_HEADER.size <= size:
+                length, checksum = RECORD_HEADER.unpack_from(self.map, offset)
+                end: int = offset + RECORD_HEADER.size + length
+                if end > size:
+                    break  # The record was only partly written
+                payload: memoryview = view[offset + RECORD_HEADER.size:end]
+                if crc32(payload) != checksum:
+                    payload.release()
+                    break  # The record is corrupt
+                yield end, payload
+                offset = end
+        finally:
+            view.release()
+
+    def checksum_at(self, start: int, end: int) -> int or None:
+        """
+        Checks that a complete record starts and ends at the offsets
+
+        :param start: The offset the record should start at
+        :param end: The offset the record should end at
+        :return: The crc32 of the record or None if there isn't a valid record there
+        """
+        if self.map is None or start < len(MAGIC) or start + RECORD_HEADER.size > end or end > len(self.map):
+            return None
+        length, checksum = RECORD_HEADER.unpack_from(self.map, start)
+        if start + RECORD_HEADER.size + length != end:
+            return None
+        with memoryview(self.map)[start + RECORD_HEADER.size:end] as payload:
+            return checksum if crc32(payload) == checksum else None
+
+    def orders(self, start: int = len(MAGIC)) -> Iterator[dict]:
+        """
+        Iterates the order records
+
+        :param start: The offset to start reading from
+        :return: Each decoded order record
+        """
+        for _, payload in self.scan(start):
+            record: dict = decode_record(payload)
+            payload.release()
+            yield record
+
+    def close(self) -> NoReturn:
+        """
+        Closes the journal
+        """
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'JournalReader':
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+
+class JournalPosition:
+    offset: int  # The end of the last record that was read
+    start: int  # The start of the last record that was read
+    checksum: int or None  # The crc32 of the last record that was read (None if none were read)
+    device: int or None  # The device of the journal file that was read
+    inode: int or None  # The inode of the journal file that was read
+
+    def __init__(self, offset: int = len(MAGIC), start: int = 0, checksum: int or None = None,
+                 device: int or None = None, inode: int or None = None) -> None:
+        """
+        How far through a journal a reader has got. The journal file and the
+        last record read are remembered so that reading can only carry on from
+        the offset if it is still the same journal (a journal that was rotated
+        or replaced would otherwise be read from the middle of a record)
+
+        :param offset: The end of the last record that was read
+        :param start: The start of the last record that was read
+        :param checksum: The crc32 of the last record that was read
+        :param device: The device of the journal file
+        :param inode: The inode of the journal file
+        """
+        self.offset = offset
+        self.start = start
+        self.checksum = checksum
+        self.device = device
+        self.inode = inode
+
+    def to_record(self) -> dict:
+        """
+        :return: The position as a record (for saving)
+        """
+        return {'offset': self.offset, 'start': self.start, 'checksum': self.checksum,
+                'device': self.device, 'inode': self.inode}
+
+    def resume(self, reader: JournalReader) -> bool:
+        """
+        Checks the reader is reading the same journal as before, starting
+        from the beginning again if it isn't
+
+        :param reader: The reader of the journal
+        :return: Whether or not the position was kept
+        """
+        info: os.stat_result = os.fstat(reader.file.fileno())
+        same: bool = (info.st_dev, info.st_ino) == (self.device, self.inode)
+        if same and self.checksum is not None:
+            same = reader.checksum_at(self.start, self.offset) == self.checksum
+        if not same:
+            self.__init__(device=info.st_dev, inode=info.st_ino)
+        return same
+
+    def scan(self, reader: JournalReader) -> Iterator[memoryview]:
+        """
+        Iterates the records after the position, moving the position past each one
+
+        :param reader: The reader of the journal (checked with resume first)
+        :return: A view of the bytes of each record
+        """
+        try:
+            for end, payload in reader.scan(self.offset):
+                self.start = self.offset
+                self.offset = end
+                yield payload
+        finally:
+            if self.start >= len(MAGIC):
+                self.checksum = reader.checksum_at(self.start, self.offset)
+
+
+def decode_record(payload: memoryview) -> dict:
+    """
+    Decodes an order record straight from its view (json.loads
+    would copy it first and then work out its encoding)
+
+    :param payload: The view of the record's bytes
+    :return: The decoded order record
+    """
+    return DECODER.raw_decode(str(payload, 'utf-8'))[0]
+
+
+def recover(path: str) -> int:
+    """
+    Finds the end of the last complete record in a journal
+    so that a record torn by a crash can be cut off
+
+    :param path: The path of the journal file
+    :return: The end of the last complete record (0 if there is no journal yet)
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    end: int = len(MAGIC)
+    with JournalReader(path) as reader:
+        for end, payload in reader.scan():
+            payload.release()
+    return end
@@ -0,0 +1,107 @@
+import asyncio
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import List, NoReturn
+
+from guiutil import ARROW
+from server import start_server
+
+PROMPT_END: bytes = f': {ARROW} '.encode()  # Every prompt ends with this so it marks the end of a screen
+
+# The keystrokes of a session that adds fish and chips, lists
+# the order, finishes it and then exits
+SCRIPT: List[str] = [
+    'Till', '021 000 0000', 'y', 'y', '1 Road',
+    '1', '1', '2', '8', '3', '13', '2.5', 'back',
+    '3', '4', 'y', 'n'
+]
+
+
+async def till(host: str, port: int, script: List[str], latencies: List[float]) -> NoReturn:
+    """
+    Runs one session as a till would, timing how long each
+    keystroke takes to get its next screen back
+
+    :param host: The host of the server
+    :param port: The port of the server
+    :param script: The lines to send
+    :param latencies: The list the latency of each keystroke is added to
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readuntil(PROMPT_END)  # Wait for the first screen
+        last: int = len(script) - 1
+        for index, line in enumerate(script):
+            start: float = perf_counter()
+            writer.write((line + '\n').encode())
+            if index == last:
+                await reader.read()  # The last line ends the session so wait for the server to close
+            else:
+                await reader.readuntil(PROMPT_END)
+            latencies.append(perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, sessions: int, concurrency: int) -> NoReturn:
+    """
+    Runs many sessions at once against the server and
+    prints out the sessions per second and keystroke latency
+
+    :param host: The host of the server
+    :param port: The port of the server
+    :param sessions: The total amount of sessions to run
+    :param concurrency: The amount of tills connected at once
+    """
+    latencies: List[float] = []
+    remaining: List[int] = [sessions]
+
+    async def worker() -> NoReturn:
+        # Keep running sessions until there are none left
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            await till(host, port, SCRIPT, latencies)
+
+    start: float = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds: float = perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(value: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000
+
+    print(f'Sessions: {sessions} ({concurrency} at once)')
+    print(f'Time: {seconds:.3f}s ({sessions / seconds:,.1f} sessions per second)')
+    print(f'Keystrokes: {len(latencies)} ({len(latencies) / seconds:,.0f} per second)')
+    print(f'Keystroke latency: p50 {percentile(0.5):.3f}ms, p95 {percentile(0.95):.3f}ms, '
+          f'p99 {percentile(0.99):.3f}ms, max {latencies[-1] * 1000:.3f}ms')
+
+
+async def run(host: str or None, port: int, sessions: int, concurrency: int) -> NoReturn:
+    """
+    Runs the load test against a server, starting a local
+    server in this process if no host is provided
+
+    :param host: The host of the server (None for a local server)
+    :param port: The port of the server
+    :param sessions: The total amount of sessions to run
+    :param concurrency: The amount of tills connected at once
+    """
+    if host is not None:
+        await load_test(host, port, sessions, concurrency)
+        return
+    server: asyncio.AbstractServer = await start_server('127.0.0.1', 0)
+    local_port: int = server.sockets[0].getsockname()[1]
+    async with server:
+        await load_test('127.0.0.1', local_port, sessions, concurrency)
+
+
+if __name__ == '__main__':
+    parser: ArgumentParser = ArgumentParser(description='Load tests the till server')
+    parser.add_argument('--host', help='The host of a running server (defaults to a local server)')
+    parser.add_argument('--port', type=int, default=9000, help='The port of a running server')
+    parser.add_argument('--sessions', type=int, default=1000, help='The total amount of sessions to run')
+    parser.add_argument('--concurrency', type=int, default=200, help='The amount of tills connected at once')
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.sessions, args.concurrency))
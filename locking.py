@@ -0,0 +1,31 @@
+import os
+from typing import NoReturn
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Windows locks a range of bytes (and stops other processes reading them) so the
+# byte that is locked is far past the end of anything that is written to the file
+LOCK_OFFSET: int = 0x7FFFFFFF
+
+
+def lock_file(handle: int) -> NoReturn:
+    """
+    Takes an exclusive lock on an open file without waiting for it. The lock is
+    held until the file is closed (the operating system releases it even after
+    a crash) and only stops other processes taking the same lock
+
+    :param handle: The open file descriptor
+    :raises OSError: If another process already holds the lock
+    """
+    if os.name == 'nt':
+        position: int = os.lseek(handle, 0, os.SEEK_CUR)
+        os.lseek(handle, LOCK_OFFSET, os.SEEK_SET)
+        try:
+            msvcrt.locking(handle, msvcrt.LK_NBLCK, 1)
+        finally:
+            os.lseek(handle, position, os.SEEK_SET)
+    else:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
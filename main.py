@@ -1,14 +1,22 @@
-from typing import NoReturn
+import os
+from typing import Coroutine, NoReturn, Tuple
+from console import write, flush
+from frames import FrameCache, source_key
 from guiutil import *
 from input import *
+from menu import MenuIndex, MenuSource
+from metrics import timed
+from order import OrderConfig
 
 VERSION: str = '2.5.0'  # The current version of this program
 MAX_PER_FISH: int = 7  # The maximum amount of fish per type
 MAX_AMOUNT_CHIPS: int = 5  # The maximum amount of sets of chips
 MAX_SCOOPS_CHIPS: float = 10  # The maximum scoop size for chips
-DELIVERY_CHARGE: float = 5  # The amount to charge for delivery
-FROZEN_DISCOUNT: float = 1.05  # The amount to take away from every frozen fish item
-GST_AMOUNT: float = 0.15  # The amount of GST (15% = 0.15)
+DELIVERY_CHARGE: int = 500  # The amount to charge for delivery in cents
+FROZEN_DISCOUNT: int = 105  # The amount in cents to take away from every frozen fish item
+GST_AMOUNT: int = 1500  # The amount of GST in basis points (15% = 1500)
+JOURNAL_PATH: str = 'orders.journal'  # The file finished orders are recorded in
+METRICS_VARIABLE: str = 'FFF_METRICS'  # The environment variable with the file to write the metrics to on exit
 
 TITLE_MESSAGE: str = f"""
  ______            _     _            ______        _    ______              _ 
@@ -21,36 +29,70 @@ TITLE_MESSAGE: str = f"""
                            |___/   Ordering System Version: {VERSION}
 """  # The ASCII art of "Freddy's Fast Food"
 
-MENU: dict = {
-    'types': [
-        {
-            'name': 'Cheap',  # The name of this type
-            'price': 4.10,  # The price of this type
-            'price_format': '{} each',  # The format of this price {} is where the number will be placed
-            'items': [  # A list of items in this type
-                'Shark', 'Flounder', 'Cod',
-                'Gurnet', 'Blue Moki', 'Arrow Squid'
-            ]
-        },
-        {
-            'name': 'Delux',
-            'price': 7.20,
-            'price_format': '{} each',
-            'items': [
-                'Snapper', 'Pink Salmon', 'Tuna',
-                'Smoked Marlin', 'Kingfish', 'Trevally'
-            ]
-        },
-        {
-            'name': 'Chips',  # The name of this type
-            'price': 2.00,  # The price of this type
-            'price_format': '{} per scoop',  # The format of this price {} is where the number will be placed
-            'text': 'Specify custom amount'  # A text to be displayed instead of a list of items
-        }
-    ],
-}
-
-order: Order  # The current order object
+# The menu file (json or toml) each type has a name, a price, a price_format where {} is
+# where the price will be placed and either a list of items or a text to display instead
+DIRECTORY: str = os.path.dirname(os.path.abspath(__file__))  # The directory the program is in
+MENU_PATH: str = os.path.join(DIRECTORY, 'menu.json')
+MENU_SOURCE: MenuSource = MenuSource(MENU_PATH)  # The menu file (reloaded when it changes)
+FRAMES_PATH: str = MENU_PATH + '.frames.snapshot'  # The cache of the screens that never change
+# The source files that render the screens (the prompts, the layout and the prices)
+FRAMES_SOURCES: Tuple[str, ...] = tuple(
+    os.path.join(DIRECTORY, name) for name in ('main.py', 'guiutil.py', 'money.py')
+)
+# The screens that never change, thrown away whenever the version,
+# the menu file or the code that renders the screens changes
+FRAMES: FrameCache = FrameCache(FRAMES_PATH, (VERSION, MENU_SOURCE.stat_key, source_key(FRAMES_SOURCES)))
+
+# The prompt for the amount of a fish to add (the fish type and the remaining amount change)
+ADD_FISH_PROMPT: PromptTemplate = PromptTemplate([
+    'Enter "back" to go back or enter the amount of',
+    '"{}" you would like. You cannot add more',
+    'than {}'
+])
+
+
+class Session:
+    order: Order or None  # The current order object
+    journal: 'JournalWriter or None'  # The journal finished orders are written to
+
+    def __init__(self, journal: 'JournalWriter or None' = None) -> None:
+        """
+        The state of a single till. Each till gets its own
+        session so that many tills can be served at once
+
+        :param journal: The journal finished orders are written to
+        """
+        self.order = None
+        self.journal = journal
+
+    async def record(self, order: Order) -> NoReturn:
+        """
+        Keeps a record of a finished order in the journal. A local
+        till writes it straight away as it has nothing else to do
+        while the journal is written
+
+        :param order: The finished order
+        """
+        if self.journal is not None:
+            self.journal.append_order(order)
+
+
+def run_local(coroutine: Coroutine) -> object:
+    """
+    Runs the screens for a local till. The local console never
+    actually waits (input blocks instead) so the screens can be
+    run to the end without starting an event loop, which saves
+    importing asyncio when the till starts
+
+    :param coroutine: The screens to run
+    :return: The result of the screens
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    coroutine.close()
+    raise RuntimeError('The local till can only use a console that doesn\'t wait')
 
 
 def menu_title() -> NoReturn:
@@ -58,53 +100,93 @@ def menu_title() -> NoReturn:
     Prints out the large ASCII art of "Freddy's Fast Food"
     along with the splitter above and below it
     """
-    print(splitter())
-    print(TITLE_MESSAGE)
-    print(splitter())
+    write(FRAMES.get('title', lambda: splitter() + '\n' + TITLE_MESSAGE + '\n' + splitter()))
 
 
-def menu_init() -> NoReturn:
+def create_config(menu: MenuIndex) -> OrderConfig:
     """
-    Creates a new order object and prompts the user for their
-    details along with asking about frozen and delivery options
+    Creates the limits and pricing shared by every order
+
+    :param menu: The version of the menu the orders are priced with
+    :return: The created config
     """
-    global order
-    # Creates a new order object and assigns it to order
-    order = Order(
+    return OrderConfig(
         MAX_PER_FISH,
         MAX_AMOUNT_CHIPS,
         MAX_SCOOPS_CHIPS,
         FROZEN_DISCOUNT,
         GST_AMOUNT,
-        DELIVERY_CHARGE
+        DELIVERY_CHARGE,
+        menu
     )
+
+
+order_config: OrderConfig = create_config(MENU_SOURCE.index)  # The config of the current menu version
+
+
+def current_config() -> OrderConfig:
+    """
+    Finds the config for the latest version of the menu, reloading
+    the menu if its file has changed. The config is swapped for a new
+    one so orders that already started keep the version they started with
+
+    :return: The config of the latest menu version
+    """
+    global order_config
+    MENU_SOURCE.refresh()
+    menu: MenuIndex = MENU_SOURCE.index
+    if order_config.menu is not menu:
+        order_config = create_config(menu)
+    return order_config
+
+
+def new_order() -> Order:
+    """
+    Creates a new empty order using the limits
+    and pricing of this program
+
+    :return: The created order
+    """
+    return Order(current_config())
+
+
+async def menu_init(session: Session) -> NoReturn:
+    """
+    Creates a new order object and prompts the user for their
+    details along with asking about frozen and delivery options
+
+    :param session: The session of the till
+    """
+    # Creates a new order object and assigns it to the session
+    order: Order = new_order()
+    session.order = order
     # Prompts the user for the customer name and assigns the variable order.name
-    order.name = accept(create_prompt([
+    order.name = await accept(create_prompt([
         'Please enter the name of the customer'
     ]), lambda value: True)  # Accepting any values
     # Prompts the user for the customer phone number and assigns the variable order.phone
-    order.phone = accept(create_prompt([
+    order.phone = await accept(create_prompt([
         'Please enter the phone number of the customer'
     ]), lambda value: True)  # Accepting any values
     # Prompts the user for a frozen discount and assigns the variable order.frozen
-    order.frozen = accept_bool(create_prompt([
+    order.frozen = await accept_bool(create_prompt([
         'Would you like your order frozen? [Y/N] Frozen orders',
         f'receive a discount of {format_price(FROZEN_DISCOUNT)} per fish item',
     ]))  # Accepts booleans
     # Prompts the user for delivery and assigns the variable order.delivery
-    order.delivery = accept_bool(create_prompt([
+    order.delivery = await accept_bool(create_prompt([
         'Would the customer like delivery? [Y/N]',
         'Delivery will cost an extra ' + format_price(DELIVERY_CHARGE)
     ]))  # Accepts booleans
     if order.delivery:  # The customer wants delivery
         # Prompts the user for their address and assigns the variable order.address
-        order.address = accept(create_prompt([
+        order.address = await accept(create_prompt([
             'Please enter the address the customer',
             'would like to have it delivered too'
         ]), lambda value: True)  # Accepts any values
 
 
-def menu_main() -> NoReturn:
+async def menu_main(session: Session) -> NoReturn:
     """
     Prints out the main menu and prompts
     the user for what menu they would like to go to next
@@ -113,237 +195,318 @@ def menu_main() -> NoReturn:
     unless the order is cancelled and/or the user chooses to
     exit.
 
+    :param session: The session of the till
     """
     while True:
         # Prompts the user for which menu they would like to visit
-        menu_selection: int = accept_int(create_prompt([
+        menu_selection: int = await accept_int(FRAMES.get('main', lambda: create_prompt([
             '1) Add item "Adds an item to the order"',
             '2) Remove item "Removes an item from the order"',
             '3) List order "Displays the contents of the order"',
             '4) Finish Order "Finalizes the order"',
             '5) Cancel Order "Cancels the current order and resets"'
-        ]), 1, 5)  # Accepts numbers from 1 - 6
+        ])), 1, 5)  # Accepts numbers from 1 - 6
         if menu_selection == 1:  # If the user enters 2 (Add Item)
-            menu_add()  # Enter the menu_add screen
+            await menu_add(session)  # Enter the menu_add screen
         elif menu_selection == 2:  # If the user enters 3 (Remove Item)
-            menu_remove()  # Enter the menu_remove screen
+            await menu_remove(session)  # Enter the menu_remove screen
         elif menu_selection == 3:  # If the user enters 4 (List Order)
-            menu_order()  # Enter the menu_order screen
+            await menu_order(session)  # Enter the menu_order screen
         elif menu_selection == 4:  # If the user enters 5 (Finish Order)
             # Enter the menu_finish screen if this returns True
             # we are being told to exit the main loop (shutdown)
-            if menu_finish():
+            if await menu_finish(session):
                 break  # Exit the main loop
         elif menu_selection == 5:  # If the user enters 6 (Cancel Order)
             # Enter the menu_cancel screen if this returns True
             # we are being told to exit the main loop (shutdown)
-            if menu_cancel():
+            if await menu_cancel(session):
                 break  # Exit the main loop
 
 
-def menu_list() -> NoReturn:
+async def menu_list(session: Session) -> int or None:
+    """
+    Prints out the menu (The list of available items). Menus
+    that don't fit on one page are shown a page at a time where
+    the user can change pages, jump to a section by its name or
+    pick an item by its number
+
+    :param session: The session of the till
+    :return: The ordinal of the item picked or None if no item was picked
     """
-    Prints out the menu (The list of available items)
+    # The menu of the version the order started with so the numbers match menu_add
+    menu: MenuIndex = session.order.config.menu
+    if menu.total_items <= MENU_PAGE_SIZE:
+        write(FRAMES.get(f'menu-{menu.version}', lambda: create_menu(menu.types)))
+        return None
+    pages: int = menu_pages(menu)  # The amount of pages the menu takes up
+    page: int = 0  # The current page
+    while True:
+        write(create_menu_page(menu, page))  # Only the current page is rendered
+        user_input: str = (await accept(create_prompt([
+            'Enter "next" or "prev" to change page, the name',
+            'of a section to jump to it, the number of an item',
+            'to pick it or "back" to go back'
+        ]), lambda value: value.lower() in menu.section_names or Validation.list_or_int(
+            value.lower(),  # The provided value
+            ['next', 'prev', 'back'],  # The acceptable string values
+            1, menu.total_items  # The min and max int values
+        ))).lower()  # Convert the value to lowercase for case insensitivity
+
+        if user_input == 'back':  # If the user typed "back"
+            return None
+        elif user_input == 'next':  # If the user typed "next"
+            page = min(page + 1, pages - 1)
+        elif user_input == 'prev':  # If the user typed "prev"
+            page = max(page - 1, 0)
+        elif user_input in menu.section_names:  # If the user typed the name of a section
+            page = section_page(menu, menu.section_names[user_input])
+        else:
+            return int(user_input)  # The item the user picked
+
+
+def validate_item(value: str, menu: MenuIndex) -> NoReturn:
     """
-    print(create_menu(MENU['types']))
+    Validates the input of the add menu which is either "menu",
+    "back", the number of an item or a name that matches an item.
+    Throws a validation exception if its none of these
 
+    :param value: The value to validate
+    :param menu: The version of the menu the order is priced with
+    """
+    if value.lower() in ['menu', 'back']:
+        return
+    if Validation.is_int(value):
+        Validation.min_max(int(value), 1, menu.total_items)  # Validate that its within the bounds
+        return
+    # Only imported once an item is typed by name so the till starts without it
+    from search import search_index
+    if not search_index(menu).search(value, 1):
+        raise ValidationError(f'There are no items matching "{value}"')
+
+
+async def menu_search(session: Session, query: str) -> int or None:
+    """
+    Finds the items matching a typed name. A single match (or
+    an exact name) is picked straight away otherwise the matches
+    are listed for the user to pick from by their number
 
-def menu_add() -> NoReturn:
+    :param session: The session of the till
+    :param query: The typed name
+    :return: The ordinal of the item picked or None if no item was picked
+    """
+    from search import search_index
+    menu: MenuIndex = session.order.config.menu
+    matches: List[Tuple[int, str]] = search_index(menu).search(query)
+    if len(matches) == 1 or matches[0][1].lower() == query.strip().lower():
+        return matches[0][0]
+    write(create_item_list(f'Items matching "{query}"', matches))
+    user_input: str = (await accept(create_prompt([
+        'Enter "back" to go back or the number',
+        'of the item you would like'
+    ]), lambda value: Validation.list_or_int(
+        value.lower(),  # The provided value
+        ['back'],  # The acceptable string values
+        1, menu.total_items  # The min and max int values
+    ))).lower()  # Convert the value to lowercase for case insensitivity
+    if user_input == 'back':  # If the user chooses back
+        return None
+    return int(user_input)
+
+
+@timed
+async def menu_add(session: Session) -> NoReturn:
     """
     Prompts the user with the add menu allowing them
     to add items to their order
+
+    :param session: The session of the till
     """
+    order: Order = session.order  # The current order of the session
+    menu: MenuIndex = order.config.menu  # The version of the menu the order is priced with
     # Loop until break so that they can order more than one
     # item without having to keep selecting this menu over and over
     while True:
-        # The total number of types and items
-        total_types: int = 0
-        for menu_type in MENU['types']:
-            menu_type: dict  # The menu type is a dictionary
-            if 'items' in menu_type:  # If we have items
-                # Increase the total types by the amount of items
-                total_types += len(menu_type['items'])
-            else:
-                # Increase the total types
-                total_types += 1
         # Get the user input for either a menu option
         # or a number corresponding to a menu item
-        user_input: str or int = accept(create_prompt([
+        user_input: str or int = (await accept(create_prompt([
             'Enter "menu" to display the menu',
             '"back" to go back or type the number',
-            'corresponding to a menu item'
-        ]), lambda value: Validation.list_or_int(
-            value,  # The provided value
-            ['menu', 'back'],  # The acceptable string values
-            1, total_types  # The min and max int values
-        )).lower()  # Convert the value to lowercase for case insensitivity
+            'or the name of a menu item'
+        ]), lambda value: validate_item(value, menu))).lower()  # Convert the value to lowercase
 
         if user_input == 'menu':  # If the user typed "menu"
-            menu_list()  # Display the menu list
+            # Display the menu list (an item can also be picked from the pages of a large menu)
+            selected: int or None = await menu_list(session)
+            if selected is None:  # The user went back without picking an item
+                continue  # Continue the add loop
+            user_input = selected
         elif user_input == 'back':  # If the user typed "back"
             # Break out of the menu add loop this will take us to the main menu
             break
-        else:
+        elif Validation.is_int(user_input):
             user_input = int(user_input)  # The item index the user provided
-            item_type: str or None = None  # The type of the item
-            index: int = 0  # The current item index
-            for menu_type in MENU['types']:  # We need to loop the types to find the item
-                if 'items' in menu_type:  # If the type has items
-                    items: list = menu_type['items']
-                    for item in items:
-                        index += 1  # Increase the index
-                        if user_input == index:  # If the user input index matches this index
-                            item_type = item  # Set the item type to this item
-                            break  # Break out of the loop
-                    if item_type is not None:  # If the item is found
-                        break  # Break out of the loop
-                else:  # If the type has no items
-                    index += 1  # Increase the index
-                    if user_input == index:
-                        item_type = menu_type['name']
-            if item_type == 'Chips':  # If the type of the item is chips
-                # Get the remaining amount of chips that can be added
-                remaining = order.get_remaining_chips()
-
-                if remaining <= 0:  # There is no more chips remaining to add
-                    # Tell the user they cant add anymore
-                    error('You cannot add anymore lots of chips')
-                else:
-                    # Prompts the user for how many scoops they would like
-                    amount: str = accept(create_prompt([
-                        'Enter "back" to go back or enter the amount of',
-                        f'scoops you would like. You cannot add more',
-                        f'than {MAX_SCOOPS_CHIPS} scoops'
-                    ]), lambda value: Validation.list_or_float(
-                        value,  # The provided value
-                        ['back'],   # The acceptable string values
-                        0.1, MAX_SCOOPS_CHIPS  # The min and max float values
-                    )).lower()  # Convert the value to lowercase for case insensitivity
-
-                    if amount == 'back':  # If the user chooses back
-                        continue  # Continue the add loop
-
-                    # Cast the amount to a float and round to 1dp
-                    # to make sure the user cant put in numbers like 4.33333333
-                    # so they will just become 4.3
-                    amount: float = round(float(amount), 1)
-                    # Add the amount of chips to the order
-                    order.chips.append(amount)
-                    # Tell the user they have been added
-                    good(f'Added {amount} scoops of chips to the order')
+        else:
+            # The user typed the name of an item
+            selected: int or None = await menu_search(session, user_input)
+            if selected is None:  # The user went back without picking an item
+                continue  # Continue the add loop
+            user_input = selected
+
+        item_type: str = menu.get_item(user_input)  # The item at that index
+        if item_type == 'Chips':  # If the type of the item is chips
+            # Get the remaining amount of chips that can be added
+            remaining = order.get_remaining_chips()
+
+            if remaining <= 0:  # There is no more chips remaining to add
+                # Tell the user they cant add anymore
+                error('You cannot add anymore lots of chips')
+            else:
+                # Prompts the user for how many scoops they would like
+                amount: str = (await accept(create_prompt([
+                    'Enter "back" to go back or enter the amount of',
+                    f'scoops you would like. You cannot add more',
+                    f'than {MAX_SCOOPS_CHIPS} scoops'
+                ]), lambda value: Validation.list_or_float(
+                    value,  # The provided value
+                    ['back'],   # The acceptable string values
+                    0.1, MAX_SCOOPS_CHIPS  # The min and max float values
+                ))).lower()  # Convert the value to lowercase for case insensitivity
+
+                if amount == 'back':  # If the user chooses back
+                    continue  # Continue the add loop
+
+                # Cast the amount to a float and round to 1dp
+                # to make sure the user cant put in numbers like 4.33333333
+                # so they will just become 4.3
+                amount: float = round(float(amount), 1)
+                # Add the amount of chips to the order
+                order.add_chips(amount)
+                # Tell the user they have been added
+                good(f'Added {amount} scoops of chips to the order')
 
+        else:
+            # Get the remaining amount of that type of fish that can be added
+            remaining: int = order.get_remaining_fish(item_type)
+
+            if remaining <= 0:  # There is no more fish remaining to add
+                # Tell the user they cant add anymore
+                error('You cannot add anymore of that type of fish!')
             else:
-                # Get the remaining amount of that type of fish that can be added
-                remaining: int = order.get_remaining_fish(item_type)
-
-                if remaining <= 0:  # There is no more fish remaining to add
-                    # Tell the user they cant add anymore
-                    error('You cannot add anymore of that type of fish!')
-                else:
-                    # Prompts the user for how many of that fish they would like
-                    amount: str = accept(create_prompt([
-                        'Enter "back" to go back or enter the amount of',
-                        f'"{item_type}" you would like. You cannot add more',
-                        f'than {remaining}'
-                    ]), lambda value: Validation.list_or_int(
+                # Prompts the user for how many of that fish they would like
+                amount: str = (await accept(
+                    ADD_FISH_PROMPT.format(item_type, remaining), lambda value: Validation.list_or_int(
                         value,  # The provided value
                         ['back'],  # The acceptable string values
                         1, remaining  # The min and max int values
-                    )).lower()  # Convert the value to lowercase for case insensitivity
+                    )
+                )).lower()  # Convert the value to lowercase for case insensitivity
 
-                    if amount == 'back':  # If the user chooses back
-                        continue  # Continue the add loop
+                if amount == 'back':  # If the user chooses back
+                    continue  # Continue the add loop
 
-                    # Add the amount of fish to the order
-                    order.add_fish(item_type, int(amount))
-                    # Tell the user they have been added
-                    good(f'Added {amount} {item_type}')
+                # Add the amount of fish to the order
+                order.add_fish(item_type, int(amount))
+                # Tell the user they have been added
+                good(f'Added {amount} {item_type}')
 
 
-def menu_remove() -> NoReturn:
+@timed
+async def menu_remove(session: Session) -> NoReturn:
     """
     Prompts the user with the remove menu allowing them
     to remove items from their order
+
+    :param session: The session of the till
     """
+    order: Order = session.order  # The current order of the session
     if order.empty():  # The current order is empty
         # Tell the user the order is empty
         error('The current order is empty!')
     else:
-        # Calculate the total number of items in the order
-        total_items: int = len(order.fish) + len(order.chips)
-        # Display the current order
-        menu_order()
+        # Display the current order (this also numbers the lines from 1 again)
+        await menu_order(session)
         # Loop until break so that they can remove more than one
         # item without having to keep selecting this menu over and over
         while True:
 
             # Get the user input for either a menu option
             # or a number corresponding to a order item
-            user_input: str = accept(create_prompt([
+            user_input: str = (await accept(create_prompt([
                 'Enter "order" to list the current order',
                 '"back" to go back or type the number',
                 'corresponding to a order item to remove'
             ]), lambda value: Validation.list_or_int(
                 value,  # The provided value
                 ['order', 'back'],  # The acceptable string values
-                1, total_items  # The min and max int values
-            )).lower()  # Convert the value to lowercase for case insensitivity
+                1, order.line_count()  # The min and max int values
+            ))).lower()  # Convert the value to lowercase for case insensitivity
 
             if user_input == "order":  # If the user chooses "order"
-                menu_order()  # Display the current order
+                await menu_order(session)  # Display the current order
                 continue  # Continue the remove loop
 
             if user_input == "back":  # If the user chooses "back"
                 # Break out of the menu add loop this will take us to the main menu
                 break
 
-            user_input: int = int(user_input)  # Casting the user input to an int
-
-            total_fish: int = len(order.fish)  # Get the total number of fish
-            if user_input <= total_fish:  # If the user input index is within the total fish amount
-                fish_type: str = list(order.fish)[user_input - 1]  # Get the type of fish using the key index
-                amount: int = order.fish[fish_type]  # Get the amount of that type of fish
-                order.fish.pop(fish_type)  # Remove the fish from the order
-                good(f'Removed {amount} {fish_type}')  # Tell the user it was removed
-            else:  # Otherwise move on
-                user_input -= total_fish + 1  # Decrease the user input to move on to the next type
-                if user_input <= len(order.chips):  # If the user input is within the total chips amount
-                    amount: float = order.chips[user_input]  # Get the amount of chips using the index
-                    order.chips.remove(user_input)  # Remove the chips from the order
-                    good(f'Removed {amount} scoops of chips')  # Tell the user it was removed
+            # Removed lines keep their number until the order is listed again
+            # so the numbers on the screen still match the remaining lines
+            removed: Tuple[str, float] or None = order.remove_line(int(user_input))
+            if removed is None:  # The line was already removed
+                error('That item has already been removed')
+                continue
+            item_type, amount = removed
+            if item_type == 'Chips':  # The line was a lot of chips
+                good(f'Removed {amount} scoops of chips')  # Tell the user it was removed
+            else:
+                good(f'Removed {amount} {item_type}')  # Tell the user it was removed
 
 
-def menu_order() -> NoReturn:
+@timed
+async def menu_order(session: Session) -> NoReturn:
     """
     Prints out the current order which contains
     all the added items and their prices
+
+    :param session: The session of the till
     """
-    print(create_order_list(order, MENU['types']))  # Prints out the order
+    session.order.compact()  # Drops the removed lines so the listed numbers start from 1 again
+    write(create_order_list(session.order, session.order.config.menu))  # Prints out the order
 
 
-def menu_finish() -> bool:
+@timed
+async def menu_finish(session: Session) -> bool:
     """
     Prompts the user with the finish menu
     for confirming the order then starting a new
     one if needed
 
+    :param session: The session of the till
     :return: Whether or not the exit
     """
-    if order.empty():  # The current order is empty
+    if session.order.empty():  # The current order is empty
         # Tell the user the order is empty
         error('The current order is empty!')
         return False  # Order has nothing in it so we must continue
 
-    menu_order()  # Displays the current order
+    await menu_order(session)  # Displays the current order
 
     # Prompt the user to make sure the order is correct
-    if accept_bool(
+    if await accept_bool(
             create_prompt(['Is the listed order correct? [Y/N]', 'Selecting no will return to the menu.'])
     ):  # The order is correct
+        # Keep a record of the finished order
+        await session.record(session.order)
+        # Count the order towards the live sales (only imported once the first order is finished)
+        from dashboard import record_sale
+        record_sale(session.order)
 
         # Prompt the user if they would like to restart
-        if accept_bool(create_prompt(['Would you like to start again? (Y/N)'])):  # They would like to start again
-            menu_init()  # Initialize the order again
+        if await accept_bool(create_prompt([
+            'Would you like to start again? (Y/N)'
+        ])):  # They would like to start again
+            await menu_init(session)  # Initialize the order again
             return False  # They want to start again so continue the main loop
         else:
             return True  # The user does not want to start again so we will exit
@@ -352,32 +515,59 @@ def menu_finish() -> bool:
         return False
 
 
-def menu_cancel() -> bool:
+async def menu_cancel(session: Session) -> bool:
     """
     The menu function for canceling the
     order and restarting / closing the program
 
+    :param session: The session of the till
     :return: Whether or not the exit
     """
-    global order
     # Set the order to None
-    order = None
+    session.order = None
     # Inform the user that the order is cancelled
     good('Current order cancelled')
     # Prompt the user if they would like to restart
-    if accept_bool(create_prompt([
+    if await accept_bool(create_prompt([
         'Would you like to start again? (Y/N)'
     ])):
-        menu_init()  # Initialize the order again
+        await menu_init(session)  # Initialize the order again
         return False
     else:
         return True
 
 
-if __name__ == '__main__':
+async def main(session: Session) -> NoReturn:
+    """
+    Runs a whole session from the title screen
+    until the user chooses to exit
+
+    :param session: The session of the till
+    """
     # Displays the title "Freddy's Fast Food"
     menu_title()
     # Displays the init menu
-    menu_init()
+    await menu_init(session)
     # Displays the main menu
-    menu_main()
+    await menu_main(session)
+
+
+if __name__ == '__main__':
+    # Only the local till imports these (the server and the batch jobs import this module for its screens)
+    from journal import JournalLockedError, JournalWriter
+    from metrics import write_metrics
+    try:
+        order_journal: JournalWriter = JournalWriter(JOURNAL_PATH)
+    except JournalLockedError as e:
+        raise SystemExit(str(e))  # Another till in this directory is already running
+    # The till blocks while waiting for input so the journal is synced from its own thread
+    order_journal.start_timer()
+    try:
+        run_local(main(Session(order_journal)))
+    finally:
+        flush()  # Write out the last screen
+        order_journal.close()
+        FRAMES.save()
+        if METRICS_VARIABLE in os.environ:
+            # Prometheus text or json (if the file ends with .json)
+            write_metrics(os.environ[METRICS_VARIABLE])
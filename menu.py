@@ -0,0 +1,275 @@
+import marshal
+import os
+import sys
+from typing import List, Dict, NoReturn
+
+from money import to_cents
+
+SNAPSHOT_VERSION: int = 3  # Changed whenever the layout of the snapshot changes
+CHIPS_TYPE: str = 'Chips'  # The only type without items (it is ordered by the scoop)
+SNAPSHOT_SUFFIX: str = '.snapshot'  # Added to the path of a menu file to get the path of its snapshot
+
+
+class MenuIndex:
+    types: List[dict]  # The menu type sections this index was compiled from
+    item_types: Dict[str, str]  # The name of each item mapped to the name of its type
+    item_prices: Dict[str, int]  # The name of each item mapped to its price in cents
+    type_prices: Dict[str, int]  # The name of each type mapped to its price in cents
+    ordinals: List[str]  # The item names in menu order (ordinal 1 is index 0)
+    item_ordinals: Dict[str, int]  # The name of each item mapped to its ordinal
+    ordinal_sections: List[int]  # The index of the type section of each ordinal (ordinal 1 is index 0)
+    section_starts: List[int]  # The first ordinal of each type section
+    section_names: Dict[str, int]  # The lowercase name of each type section mapped to its index
+    total_items: int  # The total number of selectable items on the menu
+    version: int  # The version of the menu (increased every time the menu file is reloaded)
+
+    def __init__(self, types: List[dict], version: int = 1) -> None:
+        """
+        Compiles the menu type sections into lookup tables
+        so that finding an item, its type or its price doesn't
+        require walking the whole menu. An index is never changed
+        once compiled, a changed menu gets a new index instead
+
+        :param types: The menu type sections to compile
+        :param version: The version of the menu
+        """
+        self.types = types
+        self.version = version
+        self.item_types = {}
+        self.item_prices = {}
+        self.type_prices = {}
+        self.ordinals = []
+        self.item_ordinals = {}
+        self.ordinal_sections = []
+        self.section_starts = []
+        self.section_names = {}
+        for section, menu_type in enumerate(types):
+            name: str = menu_type['name']  # The name of the section
+            price: int = to_cents(menu_type['price'])  # The price of the items in this section in cents
+            self.type_prices[name] = price
+            self.section_starts.append(len(self.ordinals) + 1)
+            self.section_names[name.lower()] = section
+            if 'items' in menu_type:  # If this type has items each item gets its own ordinal
+                for item in menu_type['items']:
+                    self.item_types[item] = name
+                    self.item_prices[item] = price
+                    self.ordinals.append(item)
+                    self.item_ordinals[item] = len(self.ordinals)
+                    self.ordinal_sections.append(section)
+            else:  # Otherwise the type itself is the selectable item (e.g. chips)
+                self.ordinals.append(name)
+                self.ordinal_sections.append(section)
+        self.total_items = len(self.ordinals)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple, version: int = 1) -> 'MenuIndex':
+        """
+        Restores an index from a snapshot without compiling it again
+
+        :param snapshot: The snapshot made by to_snapshot
+        :param version: The version of the menu
+        :return: The restored index
+        """
+        index: MenuIndex = cls.__new__(cls)
+        (index.types, index.item_types, index.item_prices, index.type_prices, index.ordinals,
+         index.item_ordinals, index.ordinal_sections, index.section_starts, index.section_names) = snapshot
+        index.total_items = len(index.ordinals)
+        index.version = version
+        return index
+
+    def to_snapshot(self) -> tuple:
+        """
+        :return: The lookup tables of the index as plain values (so they can be marshalled)
+        """
+        return (self.types, self.item_types, self.item_prices, self.type_prices, self.ordinals,
+                self.item_ordinals, self.ordinal_sections, self.section_starts, self.section_names)
+
+    def get_item(self, ordinal: int) -> str:
+        """
+        Finds the item at the provided ordinal (the number
+        displayed next to the item on the menu)
+
+        :param ordinal: The ordinal of the item starting at 1
+        :return: The name of the item or type at that ordinal
+        """
+        return self.ordinals[ordinal - 1]
+
+    def get_price(self, item_name: str, is_name: bool) -> int:
+        """
+        Finds the price of the specified item
+
+        :param item_name: The name of the item
+        :param is_name: If true then the item name is a type name not an item
+        :return: The price in cents or 0 if not found
+        """
+        if is_name:
+            return self.type_prices.get(item_name, 0)
+        return self.item_prices.get(item_name, 0)
+
+
+def read_menu_file(path: str) -> dict:
+    """
+    Reads a menu file (toml if the path ends with .toml otherwise json)
+
+    :param path: The path of the menu file
+    :return: The menu
+    """
+    # Imported here so starting from a snapshot doesn't need to load them
+    if path.endswith('.toml'):
+        try:
+            import tomllib  # Only included with python 3.11 and above
+        except ImportError:
+            raise ValueError('Reading "{}" needs python 3.11 or above for toml'.format(path))
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    import json
+    with open(path) as file:
+        return json.load(file)
+
+
+def validate_menu(menu: dict) -> List[dict]:
+    """
+    Checks that a menu is complete and that all of its values
+    are the right types. Throws a ValueError describing the first
+    problem found
+
+    :param menu: The menu
+    :return: The menu type sections
+    """
+    if not isinstance(menu, dict) or not isinstance(menu.get('types'), list) or len(menu['types']) < 1:
+        raise ValueError('The menu must have a list of types')
+    # The names of every type and item (names must be unique as they're used to look items up)
+    names: set = set()
+    sections: set = set()  # The lowercase names of the types
+    for number, menu_type in enumerate(menu['types'], 1):
+        if not isinstance(menu_type, dict):
+            raise ValueError('Type {} must be an object'.format(number))
+        name = menu_type.get('name')
+        if not isinstance(name, str) or len(name) < 1:
+            raise ValueError('Type {} must have a name'.format(number))
+        if name in names or name.lower() in sections:
+            raise ValueError('The name "{}" is used more than once'.format(name))
+        names.add(name)
+        sections.add(name.lower())  # Sections are jumped to by name ignoring case
+        price = menu_type.get('price')
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            raise ValueError('The price of "{}" must be a number that is 0 or more'.format(name))
+        to_cents(price)  # Throws if the price isn't a whole amount of cents
+        price_format = menu_type.get('price_format', '{}')
+        if not isinstance(price_format, str) or '{}' not in price_format:
+            raise ValueError('The price format of "{}" must contain {{}}'.format(name))
+        if ('items' in menu_type) == ('text' in menu_type):
+            raise ValueError('Type "{}" must have either items or text'.format(name))
+        if 'items' in menu_type:
+            items = menu_type['items']
+            if not isinstance(items, list) or len(items) < 1:
+                raise ValueError('The items of "{}" must be a list with at least one item'.format(name))
+            for item in items:
+                if not isinstance(item, str) or len(item) < 1:
+                    raise ValueError('The items of "{}" must be names'.format(name))
+                if item in names:
+                    raise ValueError('The name "{}" is used more than once'.format(item))
+                names.add(item)
+        elif not isinstance(menu_type['text'], str):
+            raise ValueError('The text of "{}" must be text'.format(name))
+        elif name != CHIPS_TYPE:
+            # The screens only know how to take an amount of scoops for a text type
+            raise ValueError('Type "{}" must have items (only "{}" can have text)'.format(name, CHIPS_TYPE))
+    return menu['types']
+
+
+def write_snapshot(path: str, snapshot: tuple) -> NoReturn:
+    """
+    Writes a snapshot, replacing the old one all at once so that
+    another process never reads a half written snapshot. Failing
+    to write is ignored as the menu can always be compiled again
+
+    :param path: The path of the snapshot
+    :param snapshot: The snapshot
+    """
+    temporary: str = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(temporary, 'wb') as file:
+            marshal.dump(snapshot, file)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def load_menu(path: str, version: int = 1, stat: os.stat_result or None = None) -> MenuIndex:
+    """
+    Loads a menu file. The compiled index is saved in a snapshot
+    next to the file, so while the file is unchanged it is loaded
+    directly from the snapshot without parsing, validating or
+    compiling it again
+
+    :param path: The path of the menu file (json or toml)
+    :param version: The version to give the menu
+    :param stat: The stat of the file if it has already been taken
+    :return: The compiled menu index
+    """
+    if stat is None:
+        stat = os.stat(path)
+    # The snapshot is only used if it was made from this exact version of the file
+    key: tuple = (SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size)
+    snapshot_path: str = path + SNAPSHOT_SUFFIX
+    try:
+        with open(snapshot_path, 'rb') as file:
+            snapshot = marshal.loads(file.read())
+        if snapshot[0] == key:
+            return MenuIndex.from_snapshot(snapshot[1], version)
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        pass  # There is no snapshot yet or it can't be read
+    try:
+        index: MenuIndex = MenuIndex(validate_menu(read_menu_file(path)), version)
+    except ValueError as e:
+        raise ValueError('Invalid menu "{}": {}'.format(path, e))
+    write_snapshot(snapshot_path, (key, index.to_snapshot()))
+    return index
+
+
+class MenuSource:
+    path: str  # The path of the menu file
+    index: MenuIndex  # The current version of the menu (replaced as a whole, never changed)
+    stat_key: tuple  # The modified time and size of the file the current version was loaded from
+
+    def __init__(self, path: str) -> None:
+        """
+        A menu file that is reloaded when it changes on disk. Readers
+        just take the current index, which is swapped for a new one
+        in a single assignment, so they never need a lock and never
+        see a half loaded menu
+
+        :param path: The path of the menu file (json or toml)
+        """
+        self.path = path
+        stat: os.stat_result = os.stat(path)
+        self.index = load_menu(path, 1, stat)
+        self.stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self) -> bool:
+        """
+        Loads the menu file again if it has changed since it was last
+        loaded. An invalid menu (e.g one that is half saved) is reported
+        and the current version is kept until the file changes again
+
+        :return: Whether or not a new version was loaded
+        """
+        try:
+            stat: os.stat_result = os.stat(self.path)
+        except OSError:
+            return False  # The file is being replaced so try again later
+        key: tuple = (stat.st_mtime_ns, stat.st_size)
+        if key == self.stat_key:
+            return False
+        self.stat_key = key
+        try:
+            index: MenuIndex = load_menu(self.path, self.index.version + 1, stat)
+        except (OSError, ValueError) as e:
+            sys.stderr.write('Keeping menu version {}: {}\n'.format(self.index.version, e))
+            return False
+        self.index = index
+        return True
@@ -0,0 +1,276 @@
+import json
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, thread_time, time
+from typing import Callable, Dict, Iterator, List, NoReturn, Tuple
+
+PREFIX: str = 'fff'  # The prefix of every exported metric name
+# The upper bounds in seconds of the histogram buckets (from a fast render up to a slow customer)
+BUCKETS: Tuple[float, ...] = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+    0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+# The upper bounds in bytes of the screen size histogram buckets
+BYTE_BUCKETS: Tuple[float, ...] = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+CO_COROUTINE: int = 0x80  # The code flag of coroutine functions (the same as inspect.CO_COROUTINE)
+INPUT: str = 'input'  # The name the time spent waiting for input is recorded under
+
+
+class Histogram:
+    buckets: Tuple[float, ...]  # The upper bound of each bucket
+    counts: List[int]  # The amount of values in each bucket (the last is for values above every bucket)
+    total: float  # The sum of every value
+    count: int  # The amount of values
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        """
+        Counts values into buckets
+
+        :param buckets: The upper bound of each bucket
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> NoReturn:
+        """
+        Adds a value to the histogram
+
+        :param value: The value to add
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        """
+        :return: The upper bound of each bucket and the amount of values at or below it
+        """
+        running: int = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), running
+
+    def to_dict(self) -> dict:
+        """
+        :return: The histogram as a json object
+        """
+        return {'count': self.count, 'sum': self.total, 'buckets': dict(self.cumulative())}
+
+
+class Metric:
+    name: str  # The name of the function being measured
+    calls: int  # The amount of times the function was called
+    wall: Histogram  # The seconds each call spent working (not counting the time waiting for input)
+    cpu: Histogram  # The cpu seconds each call used (not counting other sessions while waiting for input)
+    waited: float  # The total seconds the calls spent waiting for input
+
+    def __init__(self, name: str) -> None:
+        """
+        The measurements of a screen or a renderer
+
+        :param name: The name of the function being measured
+        """
+        self.name = name
+        self.calls = 0
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.waited = 0.0
+
+    def to_dict(self) -> dict:
+        """
+        :return: The measurements as a json object
+        """
+        return {
+            'calls': self.calls,
+            'wall_seconds': self.wall.to_dict(),
+            'cpu_seconds': self.cpu.to_dict(),
+            'input_wait_seconds': self.waited
+        }
+
+
+registry: Dict[str, Metric] = {}  # The measurements of each function by name
+screen_bytes: Histogram = Histogram(BYTE_BUCKETS)  # The bytes written for each screen
+
+# The total wall and cpu seconds the current session has spent waiting for input. This
+# is a context variable so that each session task on a server keeps its own total
+waiting: ContextVar = ContextVar('waiting', default=(0.0, 0.0))
+
+
+def get_metric(name: str) -> Metric:
+    """
+    :param name: The name of the function being measured
+    :return: The measurements of the function (created if its new)
+    """
+    metric: Metric or None = registry.get(name)
+    if metric is None:
+        metric = registry[name] = Metric(name)
+    return metric
+
+
+def record(metric: Metric, wall: float, cpu: float, waited: Tuple[float, float]) -> NoReturn:
+    """
+    Records a finished call taking away the time it spent waiting for input
+
+    :param metric: The measurements of the function that was called
+    :param wall: The wall seconds the call took
+    :param cpu: The cpu seconds used while the call was running
+    :param waited: The wall and cpu seconds that were spent waiting for input
+    """
+    metric.calls += 1
+    metric.wall.observe(wall - waited[0])
+    metric.cpu.observe(cpu - waited[1])
+    metric.waited += waited[0]
+
+
+def timed(function: Callable) -> Callable:
+    """
+    Decorates a function (or a coroutine function) so that its calls are
+    measured. Time spent waiting for input is kept separate so a screen
+    only counts the time the system was actually working
+
+    :param function: The function to measure
+    :return: The measured function
+    """
+    metric: Metric = get_metric(function.__name__)
+
+    # Checks the flag directly as importing inspect slows down starting
+    if function.__code__.co_flags & CO_COROUTINE:
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            before: Tuple[float, float] = waiting.get()
+            start_wall: float = perf_counter()
+            start_cpu: float = thread_time()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                after: Tuple[float, float] = waiting.get()
+                record(
+                    metric, perf_counter() - start_wall, thread_time() - start_cpu,
+                    (after[0] - before[0], after[1] - before[1])
+                )
+    else:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start_wall: float = perf_counter()
+            start_cpu: float = thread_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(metric, perf_counter() - start_wall, thread_time() - start_cpu, (0.0, 0.0))
+    return wrapper
+
+
+@contextmanager
+def waiting_for_input() -> Iterator[None]:
+    """
+    Measures the time spent waiting for the user to enter something. The
+    cpu used while waiting is also taken away from the screens because
+    on a server it belongs to the other sessions that ran in the meantime
+    """
+    start_wall: float = perf_counter()
+    start_cpu: float = thread_time()
+    try:
+        yield
+    finally:
+        wall: float = perf_counter() - start_wall
+        cpu: float = thread_time() - start_cpu
+        total_wall, total_cpu = waiting.get()
+        waiting.set((total_wall + wall, total_cpu + cpu))
+        metric: Metric = get_metric(INPUT)
+        metric.calls += 1
+        metric.wall.observe(wall)
+        metric.waited += wall
+
+
+def record_screen(size: int) -> NoReturn:
+    """
+    Records the amount of bytes written for a screen
+
+    :param size: The bytes written
+    """
+    screen_bytes.observe(size)
+
+
+def snapshot() -> dict:
+    """
+    :return: Every measurement as a json object
+    """
+    return {
+        'time': time(),
+        'functions': {name: metric.to_dict() for name, metric in registry.items()},
+        'screen_bytes': screen_bytes.to_dict()
+    }
+
+
+def write_histogram(lines: List[str], name: str, help_text: str, histograms: Dict[str, Histogram]) -> NoReturn:
+    """
+    Adds a histogram in the prometheus text format
+
+    :param lines: The lines to add to
+    :param name: The name of the histogram
+    :param help_text: The description of the histogram
+    :param histograms: The histogram of each function
+    """
+    lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+    lines.append(f'# TYPE {PREFIX}_{name} histogram')
+    for function, histogram in histograms.items():
+        for bound, count in histogram.cumulative():
+            lines.append(f'{PREFIX}_{name}_bucket{{function="{function}",le="{bound}"}} {count}')
+        lines.append(f'{PREFIX}_{name}_sum{{function="{function}"}} {histogram.total!r}')
+        lines.append(f'{PREFIX}_{name}_count{{function="{function}"}} {histogram.count}')
+
+
+def to_prometheus() -> str:
+    """
+    :return: Every measurement in the prometheus text format
+    """
+    lines: List[str] = [
+        f'# HELP {PREFIX}_calls_total The amount of times each screen and renderer was called',
+        f'# TYPE {PREFIX}_calls_total counter'
+    ]
+    for name, metric in registry.items():
+        lines.append(f'{PREFIX}_calls_total{{function="{name}"}} {metric.calls}')
+    # The input metric is only made of waiting so it has its own histogram
+    functions: Dict[str, Metric] = {name: metric for name, metric in registry.items() if name != INPUT}
+    write_histogram(lines, 'wall_seconds', 'The seconds spent working (not waiting for input)',
+                    {name: metric.wall for name, metric in functions.items()})
+    write_histogram(lines, 'cpu_seconds', 'The cpu seconds used (not counting other sessions)',
+                    {name: metric.cpu for name, metric in functions.items()})
+    if INPUT in registry:
+        write_histogram(lines, 'input_seconds', 'The seconds each input took the user to enter',
+                        {INPUT: registry[INPUT].wall})
+    lines.append(f'# HELP {PREFIX}_input_wait_seconds_total '
+                 f'The seconds spent waiting for the user to enter something')
+    lines.append(f'# TYPE {PREFIX}_input_wait_seconds_total counter')
+    for name, metric in registry.items():
+        lines.append(f'{PREFIX}_input_wait_seconds_total{{function="{name}"}} {metric.waited!r}')
+    lines.append(f'# HELP {PREFIX}_screen_bytes The bytes written for each screen')
+    lines.append(f'# TYPE {PREFIX}_screen_bytes histogram')
+    for bound, count in screen_bytes.cumulative():
+        lines.append(f'{PREFIX}_screen_bytes_bucket{{le="{bound}"}} {count}')
+    lines.append(f'{PREFIX}_screen_bytes_sum {screen_bytes.total!r}')
+    lines.append(f'{PREFIX}_screen_bytes_count {screen_bytes.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path: str) -> NoReturn:
+    """
+    Writes every measurement to a file, as json if the path ends with .json
+    otherwise in the prometheus text format. The file is replaced all at once
+    so a collector never reads a half written file
+
+    :param path: The path of the file
+    """
+    if path.endswith('.json'):
+        text: str = json.dumps(snapshot(), indent=2)
+    else:
+        text: str = to_prometheus()
+    temporary: str = path + '.tmp'
+    with open(temporary, 'w') as file:
+        file.write(text)
+    os.replace(temporary, path)
@@ -0,0 +1,103 @@
+from decimal import Decimal, InvalidOperation
+
+CENTS_SCALE: int = 100  # The number of cents in a dollar
+RATE_SCALE: int = 10000  # The scale of rates (rates are stored in basis points so 15% = 1500)
+SCOOPS_SCALE: int = 10  # The scale of scoops (scoops are stored in tenths so 2.5 scoops = 25)
+
+
+def to_cents(value: float or int or str) -> int:
+    """
+    Converts a dollar amount (e.g 4.10 or "4.10") into
+    an exact integer amount of cents. This is only used when
+    loading prices so the speed of Decimal doesn't matter here
+
+    :param value: The dollar amount
+    :return: The amount in cents
+    """
+    try:
+        # The string form of a float is the shortest decimal that
+        # represents it so 4.1 becomes exactly 410 cents
+        cents: Decimal = Decimal(str(value)) * CENTS_SCALE
+    except InvalidOperation:
+        raise ValueError('Price "{}" is not a valid number'.format(value))
+    if cents != cents.to_integral_value():
+        raise ValueError('Price "{}" has more than 2 decimal places'.format(value))
+    return int(cents)
+
+
+def to_rate(value: float or str) -> int:
+    """
+    Converts a rate (e.g 0.15 for 15%) into basis points
+
+    :param value: The rate as a fraction
+    :return: The rate in basis points
+    """
+    try:
+        points: Decimal = Decimal(str(value)) * RATE_SCALE
+    except InvalidOperation:
+        raise ValueError('Rate "{}" is not a valid number'.format(value))
+    if points != points.to_integral_value():
+        raise ValueError('Rate "{}" is more precise than a basis point'.format(value))
+    return int(points)
+
+
+def to_tenths(scoops: float) -> int:
+    """
+    Converts an amount of scoops (which is rounded to 1dp)
+    into tenths of a scoop
+
+    :param scoops: The amount of scoops
+    :return: The amount in tenths of a scoop
+    """
+    return round(scoops * SCOOPS_SCALE)
+
+
+def divide_round(value: int, divisor: int) -> int:
+    """
+    Divides two integers rounding half away from zero
+    (e.g 5.5 cents becomes 6 cents and -5.5 cents becomes -6 cents)
+    this is the rounding rule used for all money amounts
+
+    :param value: The value to divide
+    :param divisor: The positive value to divide by
+    :return: The rounded result
+    """
+    if value < 0:
+        return -((-value * 2 + divisor) // (divisor * 2))
+    return (value * 2 + divisor) // (divisor * 2)
+
+
+def apply_rate(cents: int, rate: int) -> int:
+    """
+    Calculates a rate (such as GST) of an amount of cents
+    rounded half away from zero to the nearest cent
+
+    :param cents: The amount in cents
+    :param rate: The rate in basis points
+    :return: The rated amount in cents
+    """
+    return divide_round(cents * rate, RATE_SCALE)
+
+
+def scoops_price(price: int, tenths: int) -> int:
+    """
+    Calculates the price of an amount of scoops rounded
+    half away from zero to the nearest cent
+
+    :param price: The price of a single scoop in cents
+    :param tenths: The amount of scoops in tenths
+    :return: The price of the scoops in cents
+    """
+    return divide_round(price * tenths, SCOOPS_SCALE)
+
+
+def format_cents(cents: int) -> str:
+    """
+    Formats an amount of cents as a currency (e.g $4.00)
+
+    :param cents: The amount in cents
+    :return: The formatted amount
+    """
+    dollars, remainder = divmod(abs(cents), CENTS_SCALE)
+    sign: str = '-' if cents < 0 else ''
+    return '${}{:,}.{:02d}'.format(sign, dollars, remainder)
@@ -1,87 +1,196 @@
-from random import random
-from typing import Dict, List, NoReturn
+from array import array
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, NoReturn, Tuple
 
+from ids import next_order_id
+from menu import MenuIndex
+from money import apply_rate, scoops_price, to_tenths, SCOOPS_SCALE
+
+ORDINAL_SHIFT: int = 16  # The menu ordinal of a fish line is stored above this many bits
+AMOUNT_MASK: int = (1 << ORDINAL_SHIFT) - 1  # The bits of a line that hold its amount
 
-class Order:
-    order_id: str  # The id of the order
-    name: str  # The name of the user
-    phone: str  # The phone number of the user
-    address: str  # The address of the user
-    delivery: bool  # Whether or not to deliver the order
 
-    fish: Dict[str, int]  # The fish and the amount ordered
-    chips: List[float]  # The amounts of the chips ordered
-    frozen: bool  # Whether or not the order is frozen
+class OrderConfig:
+    __slots__ = (
+        'max_per_fish', 'max_amount_chips', 'max_scoops_chips',
+        'frozen_discount', 'gst_amount', 'delivery_charge', 'menu'
+    )
 
     max_per_fish: int  # The maximum amount of fish per type
     max_amount_chips: int  # The maximum sets of chips that
     max_scoops_chips: float  # The maximum amount of scoops one lot of chips can have
-    frozen_discount: float  # The discount amount per frozen fish item
-    gst_amount: float  # The amount of GST (Government Service Tax)
-    delivery_charge: float  # The amount charged for delivery
+    frozen_discount: int  # The discount amount in cents per frozen fish item
+    gst_amount: int  # The amount of GST (Government Service Tax) in basis points
+    delivery_charge: int  # The amount charged for delivery in cents
+    menu: MenuIndex  # The compiled menu index used to price items as they are added
 
-    def __init__(self, max_per_fish: int, max_amount_chips: int, max_scoops_chips: float, frozen_discount: float,
-                 gst_amount: float, delivery_charge: float) -> None:
+    def __init__(self, max_per_fish: int, max_amount_chips: int, max_scoops_chips: float, frozen_discount: int,
+                 gst_amount: int, delivery_charge: int, menu: MenuIndex) -> None:
         """
+        The limits and pricing shared by every order
+        made from the same menu
 
         :param max_per_fish: The maximum amount of fish per type
         :param max_amount_chips: The maximum sets of chips that
         :param max_scoops_chips: The maximum amount of scoops one lot of chips can have
-        :param frozen_discount: The discount amount per frozen fish item
-        :param gst_amount: The amount of GST (Government Service Tax)
+        :param frozen_discount: The discount amount in cents per frozen fish item
+        :param gst_amount: The amount of GST (Government Service Tax) in basis points
+        :param delivery_charge: The amount charged for delivery in cents
+        :param menu: The compiled menu index used to price items
         """
-        # The order id is a randomly generated number between 1,000 and 10,000
-        self.order_id = str(round((random() * 9000) + 1000))
         self.max_per_fish = max_per_fish
         self.max_amount_chips = max_amount_chips
         self.max_scoops_chips = max_scoops_chips
         self.frozen_discount = frozen_discount
         self.gst_amount = gst_amount
         self.delivery_charge = delivery_charge
-        self.fish = {}
-        self.chips = []
+        self.menu = menu
+
+
+class Order:
+    __slots__ = (
+        'order_id', 'name', 'phone', 'address', 'config', '_delivery', '_frozen',
+        '_subtotal', '_lines', '_fish_lines', '_removed_fish', '_removed_chips'
+    )
+
+    order_id: str  # The id of the order
+    name: str  # The name of the user
+    phone: str  # The phone number of the user
+    address: str  # The address of the user
+    config: OrderConfig  # The limits and pricing shared with the other orders
+
+    _delivery: bool  # Whether or not to deliver the order
+    _frozen: bool  # Whether or not the order is frozen
+    _subtotal: int  # The running price in cents of every item in the order
+    _lines: array  # Every line of the order packed into an int (the fish sorted by ordinal then the chips)
+    _fish_lines: int  # The amount of fish lines at the start of _lines (the rest are chips)
+    _removed_fish: int  # The amount of fish lines that were removed but are still in _lines
+    _removed_chips: int  # The amount of chips lines that were removed but are still in _lines
+
+    def __init__(self, config: OrderConfig) -> None:
+        """
+
+        :param config: The limits and pricing shared with the other orders
+        """
+        # The order id is the display form of a unique id from the id generator
+        self.order_id = next_order_id()
+        self.config = config
+        self._delivery = False
+        self._frozen = False
+        self._subtotal = 0
+        # Only the lines in the order are stored (not a slot for every item on the
+        # menu) and they share a single array so each order only has one buffer.
+        # A fish line is its menu ordinal above its amount and a chips line is its
+        # scoops in tenths, a line with an amount of 0 has been removed
+        self._lines = array('I')
+        self._fish_lines = 0
+        # Removed lines are only marked as removed (so the numbers of the other lines
+        # don't change and removing is instant) until the order is compacted
+        self._removed_fish = 0
+        self._removed_chips = 0
+
+    @property
+    def fish(self) -> Mapping[str, int]:
+        """
+        :return: A read-only view of the fish and the amount ordered
+                 (the order is changed through add_fish and remove_fish)
+        """
+        return MappingProxyType(dict(self.fish_items()))
+
+    @property
+    def chips(self) -> Tuple[float, ...]:
+        """
+        :return: The amounts of scoops of the chips ordered (the order
+                 is changed through add_chips and remove_chips)
+        """
+        lines: array = self._lines
+        return tuple(lines[index] / SCOOPS_SCALE for index in range(self._fish_lines, len(lines)) if lines[index])
+
+    def fish_items(self) -> Iterator[Tuple[str, int]]:
+        """
+        :return: The fish types and the amount ordered of each (in the order of the menu)
+        """
+        ordinals: List[str] = self.config.menu.ordinals
+        lines: array = self._lines
+        for index in range(self._fish_lines):
+            amount: int = lines[index] & AMOUNT_MASK
+            if amount:  # Skip the removed fish
+                yield ordinals[(lines[index] >> ORDINAL_SHIFT) - 1], amount
+
+    def fish_count(self) -> int:
+        """
+        :return: The number of different types of fish in the order
+        """
+        return self._fish_lines - self._removed_fish
+
+    def chips_count(self) -> int:
+        """
+        :return: The number of lots of chips in the order
+        """
+        return len(self._lines) - self._fish_lines - self._removed_chips
+
+    def line_count(self) -> int:
+        """
+        :return: The number of lines in the order including the removed lines that
+                 haven't been compacted (this is the highest line number)
+        """
+        return len(self._lines)
+
+    @property
+    def delivery(self) -> bool:
+        """
+        :return: Whether or not to deliver the order
+        """
+        return self._delivery
+
+    @delivery.setter
+    def delivery(self, value: bool) -> NoReturn:
+        """
+        :param value: Whether or not to deliver the order
+        """
+        self._delivery = value
+
+    @property
+    def frozen(self) -> bool:
+        """
+        :return: Whether or not the order is frozen
+        """
+        return self._frozen
+
+    @frozen.setter
+    def frozen(self, value: bool) -> NoReturn:
+        """
+        Sets whether the order is frozen which applies or
+        removes the discount for the fish in the order
+
+        :param value: Whether or not the order is frozen
+        """
+        self._frozen = value
 
-    def calculate_prices(self, types: List[dict]) -> (int, int, int, int):
+    def calculate_prices(self) -> (int, int, int, int):
         """
         Calculates the total price, the amount of gst and the gst inclusive price
+        using the running totals which are kept up to date as items are added
+        and removed (so this doesn't need to look at the items at all)
 
-        :param types: The menu types list (this contains pricing)
-        :return: The total price, gst amount, and gst inclusive price
+        :return: The frozen discount, total price, gst amount, and gst inclusive price in cents
         """
-        # The total calculated price
-        total_price: float = 0
-        # The total amount discounted from the order
-        frozen_discount: float = 0
         if self.empty():
             # The current order is empty so we return 0 for all prices
-            return 0, 0, 0, 0, self.delivery_charge
-        for menu_type in types:
-            # The price this type of item
-            price: float = menu_type['price']
-            # If this menu has items
-            if 'items' in menu_type:
-                for fish_type in self.fish:
-                    # See if this type contains the fish type
-                    if fish_type in menu_type['items']:
-                        # Get the amount we have of that fish
-                        amount: int = self.fish[fish_type]
-                        # Increase the price by the amount * price
-                        total_price += amount * price
-                        if self.frozen:  # If the order is frozen we apply a discount
-                            total_price -= self.frozen_discount  # Decrease the total by the discount
-                            frozen_discount += self.frozen_discount  # Increase the total discount size
-            elif menu_type['name'] == 'Chips':  # Special handling for the chips
-                for amount in self.chips:
-                    # Increase the price by the amount of chips * price
-                    total_price += price * amount
-        if self.delivery:  # If the order is being delivered
-            total_price += self.delivery_charge  # Add the delivery charge to the price
-        # The gst amount of the total (e.g $total * 0.15 aka 15%)
-        total_gst: float = total_price * self.gst_amount
+            return 0, 0, 0, 0
+        # The discount is taken once for every type of fish in the order
+        discount: int = self.fish_count() * self.config.frozen_discount if self._frozen else 0
+        # The total is the price of the items minus the discount
+        total_price: int = self._subtotal - discount
+        if self._delivery:  # If the order is being delivered
+            total_price += self.config.delivery_charge  # Add the delivery charge to the price
+        # The gst amount of the total (e.g $total * 15%) rounded half up to the nearest cent
+        total_gst: int = apply_rate(total_price, self.config.gst_amount)
         # The total amount inclusive of gst (total + gst)
-        total_inc_gst: float = total_price + total_gst
+        total_inc_gst: int = total_price + total_gst
         # Return the totals
-        return frozen_discount, total_price, total_gst, total_inc_gst
+        return discount, total_price, total_gst, total_inc_gst
 
     def get_remaining_chips(self) -> int:
         """
@@ -91,9 +200,27 @@ class Order:
         :return: The remaining number of chip that can be added
         """
         # The total amount of sets of scoops
-        total_chips: int = len(self.chips)
+        total_chips: int = self.chips_count()
         # The remaining amount is the difference between the max and total
-        return self.max_amount_chips - total_chips
+        return self.config.max_amount_chips - total_chips
+
+    def _find_fish(self, ordinal: int) -> int:
+        """
+        Finds where a type of fish is (or would be) stored in the order.
+        The fish lines are kept sorted by ordinal so this is a binary search
+
+        :param ordinal: The menu ordinal of the fish type
+        :return: The index of the fish type or the index it would be added at
+        """
+        return bisect_left(self._lines, ordinal << ORDINAL_SHIFT, 0, self._fish_lines)
+
+    def _has_fish(self, index: int, ordinal: int) -> bool:
+        """
+        :param index: The index found for the fish type
+        :param ordinal: The menu ordinal of the fish type
+        :return: Whether the fish type has a line at the index (even if it was removed)
+        """
+        return index < self._fish_lines and self._lines[index] >> ORDINAL_SHIFT == ordinal
 
     def get_remaining_fish(self, fish_type: str) -> int:
         """
@@ -103,11 +230,13 @@ class Order:
         :param fish_type: The fish type to check
         :return: The remaining number of fish that can be added
         """
-        if fish_type in self.fish:
-            existing_amount: int = self.fish[fish_type]
-            remaining: int = self.max_per_fish - existing_amount
+        ordinal: int = self.config.menu.item_ordinals[fish_type]
+        index: int = self._find_fish(ordinal)
+        if self._has_fish(index, ordinal):
+            existing_amount: int = self._lines[index] & AMOUNT_MASK
+            remaining: int = self.config.max_per_fish - existing_amount
             return remaining
-        return self.max_per_fish
+        return self.config.max_per_fish
 
     def add_fish(self, fish_type: str, amount: int) -> NoReturn:
         """
@@ -116,16 +245,157 @@ class Order:
         :param fish_type: The type of the fish to add
         :param amount: The amount of that fish to add
         """
+        ordinal: int = self.config.menu.item_ordinals[fish_type]
+        index: int = self._find_fish(ordinal)
         # If the fish type already has an amount we want
         # to add onto that instead of replacing it
-        if fish_type in self.fish:
-            # Retrieve the existing amount
-            existing_amount: int = self.fish[fish_type]
-            # Set the amount to the existing and the new
-            self.fish[fish_type] = existing_amount + amount
-        else:  # We don't have any already so we can just directly set it
-            # Assign the fish type to the amount
-            self.fish[fish_type] = amount
+        if self._has_fish(index, ordinal):
+            existing_amount: int = self._lines[index] & AMOUNT_MASK
+            if existing_amount + amount > AMOUNT_MASK:  # The amount would spill into the ordinal
+                raise OverflowError(fish_type)
+            if existing_amount == 0:  # The fish was removed so its line is used again
+                self._removed_fish -= 1
+            self._lines[index] += amount
+        else:  # We don't have any already so its line is added in the order of the menu
+            if amount > AMOUNT_MASK:
+                raise OverflowError(fish_type)
+            self._lines.insert(index, ordinal << ORDINAL_SHIFT | amount)
+            self._fish_lines += 1
+        # Increase the running total by the amount * price
+        self._subtotal += amount * self.config.menu.get_price(fish_type, False)
+
+    def _remove_fish_at(self, index: int) -> int:
+        """
+        Marks the fish at an index as removed
+
+        :param index: The index of the fish type
+        :return: The amount of that fish that was removed (0 if it was already removed)
+        """
+        line: int = self._lines[index]
+        amount: int = line & AMOUNT_MASK
+        if amount == 0:
+            return 0
+        # The ordinal is kept so the line stays in its place if the fish is added again
+        self._lines[index] = line - amount
+        self._removed_fish += 1
+        # Decrease the running total by the amount * price
+        fish_type: str = self.config.menu.get_item(line >> ORDINAL_SHIFT)
+        self._subtotal -= amount * self.config.menu.get_price(fish_type, False)
+        return amount
+
+    def _remove_chips_at(self, index: int) -> float:
+        """
+        Marks the lot of chips at an index as removed
+
+        :param index: The index of the chips (starting at 0)
+        :return: The amount of scoops that were removed (0 if it was already removed)
+        """
+        index += self._fish_lines
+        tenths: int = self._lines[index]
+        if tenths == 0:
+            return 0
+        self._lines[index] = 0
+        self._removed_chips += 1
+        # Decrease the running total by the price of the scoops
+        self._subtotal -= scoops_price(self.config.menu.get_price('Chips', True), tenths)
+        return tenths / SCOOPS_SCALE
+
+    def remove_fish(self, fish_type: str) -> int:
+        """
+        Removes all of the specified fish type from the order
+
+        :param fish_type: The type of the fish to remove
+        :return: The amount of that fish that was removed
+        """
+        ordinal: int = self.config.menu.item_ordinals[fish_type]
+        index: int = self._find_fish(ordinal)
+        if not self._has_fish(index, ordinal) or self._lines[index] & AMOUNT_MASK == 0:
+            raise KeyError(fish_type)
+        return self._remove_fish_at(index)
+
+    def add_chips(self, amount: float) -> NoReturn:
+        """
+        Adds a lot of chips with the specified amount
+        of scoops to the order
+
+        :param amount: The amount of scoops
+        """
+        tenths: int = to_tenths(amount)
+        self._lines.append(tenths)
+        # Increase the running total by the price of the scoops
+        self._subtotal += scoops_price(self.config.menu.get_price('Chips', True), tenths)
+
+    def remove_chips(self, index: int) -> float:
+        """
+        Removes the lot of chips at the specified index
+
+        :param index: The index of the chips (starting at 0)
+        :return: The amount of scoops that were removed
+        """
+        if not 0 <= index < len(self._lines) - self._fish_lines or self._lines[self._fish_lines + index] == 0:
+            raise IndexError(index)
+        return self._remove_chips_at(index)
+
+    def remove_line(self, line: int) -> Tuple[str, float] or None:
+        """
+        Removes a line by its number in the order list (fish are listed
+        first then chips). Removed lines keep their place until the order
+        is compacted so the numbers of the other lines don't change and
+        finding the line doesn't need to look at the rest of the order
+
+        :param line: The number of the line (starting at 1)
+        :return: The fish type (or "Chips") and the amount removed or None if the line was already removed
+        """
+        index: int = line - 1
+        if index < self._fish_lines:
+            fish_type: str = self.config.menu.get_item(self._lines[index] >> ORDINAL_SHIFT)
+            amount: int = self._remove_fish_at(index)
+            return (fish_type, amount) if amount else None
+        scoops: float = self._remove_chips_at(index - self._fish_lines)
+        return ('Chips', scoops) if scoops else None
+
+    def compact(self) -> NoReturn:
+        """
+        Drops the removed lines so the lines are numbered
+        from 1 again (done when the order is listed)
+        """
+        if self._removed_fish or self._removed_chips:
+            self._fish_lines -= self._removed_fish
+            self._lines = array('I', (line for line in self._lines if line & AMOUNT_MASK))
+            self._removed_fish = 0
+            self._removed_chips = 0
+
+    def to_record(self) -> dict:
+        """
+        Creates a record of the order with its items and
+        prices (in cents) for storing the finished order
+
+        :return: The order record
+        """
+        frozen_discount, total_price, total_gst, total_inc_gst = self.calculate_prices()
+        record: dict = {
+            'order_id': self.order_id,
+            'menu_version': self.config.menu.version,
+            'name': self.name,
+            'phone': self.phone,
+            'frozen': self.frozen,
+            'delivery': self.delivery,
+            'fish': dict(self.fish_items()),
+            'chips': list(self.chips),
+            'delivery_charge': self.config.delivery_charge if self.delivery else 0,
+            'discount': frozen_discount,
+            'total': total_price,
+            'gst': total_gst,
+            'total_inc_gst': total_inc_gst
+        }
+        # The prices that were charged so the order can be reprinted after the menu changes
+        menu: MenuIndex = self.config.menu
+        record['prices'] = {fish_type: menu.get_price(fish_type, False) for fish_type in record['fish']}
+        if self.chips_count() > 0:
+            record['chips_price'] = menu.get_price('Chips', True)
+        if self.delivery:
+            record['address'] = self.address
+        return record
 
     def empty(self) -> bool:
         """
@@ -133,4 +403,4 @@ class Order:
 
         :return: Whether or not the order is empty
         """
-        return len(self.fish) == 0 and len(self.chips) == 0
+        return self.fish_count() == 0 and self.chips_count() == 0
@@ -0,0 +1,190 @@
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from time import perf_counter
+from typing import Deque, Iterable, Iterator, List, NoReturn, TextIO, Tuple
+
+from guiutil import write_order_list, write_record_list
+from ingest import create_order
+from input import TEXT, Field, Schema, error_message
+from journal import JournalReader
+from main import current_config
+from order import OrderConfig
+
+CHUNK_SIZE: int = 256  # The amount of orders each worker renders at a time
+CHUNKS_PER_WORKER: int = 2  # The amount of chunks to keep queued for each worker
+
+# A rendered chunk is the receipts text along with the amount
+# of orders rendered and the messages for the orders rejected
+Chunk = Tuple[str, int, List[str]]
+
+# Reprints keep the id the order was given when it was made (journal records always have one)
+ORDER_ID_SCHEMA: Schema = Schema({'order_id': Field(TEXT, description='text')})
+RECORD_ID_SCHEMA: Schema = Schema({'order_id': Field(TEXT, required=True, description='text')})
+
+
+def render_chunk(lines: List[str or bytes], recorded: bool = False) -> Chunk:
+    """
+    Renders the receipts of a chunk of orders. This runs in
+    a worker process so it only gets the raw json of each order
+
+    :param lines: The json of each order (either json lines or journal records)
+    :param recorded: Whether the orders are journal records (reprinted as they were charged)
+    :return: The receipts text, the amount rendered and the rejected messages
+    """
+    pieces: List[str] = []
+    rendered: int = 0
+    rejected: List[str] = []
+    # The menu is only checked for changes once for the whole chunk
+    config: OrderConfig or None = None if recorded else current_config()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            rejected.append('Invalid json: {}'.format(e))
+            continue
+        if not isinstance(record, dict):
+            rejected.append('Order must be a json object')
+            continue
+        values, errors = (RECORD_ID_SCHEMA if recorded else ORDER_ID_SCHEMA).validate(record)
+        if errors:
+            rejected.append(error_message(errors[0]))
+            continue
+        if recorded:
+            # Journaled orders were already charged so they aren't priced again with today's menu
+            write_record_list(record, pieces.append)
+            pieces.append('\n')
+            rendered += 1
+            continue
+        order, message = create_order(record, config)
+        if order is None:
+            rejected.append(message)
+            continue
+        if values['order_id'] is not None:
+            order.order_id = values['order_id']
+        write_order_list(order, order.config.menu, pieces.append)
+        pieces.append('\n')
+        rendered += 1
+    return ''.join(pieces), rendered, rejected
+
+
+def read_lines(file: TextIO) -> Iterator[str]:
+    """
+    Reads the json lines orders skipping blank lines
+
+    :param file: The json lines file
+    :return: The json of each order
+    """
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def read_journal(path: str) -> Iterator[bytes]:
+    """
+    Reads the orders recorded in a journal
+
+    :param path: The path of the journal file
+    :return: The json of each order
+    """
+    with JournalReader(path) as reader:
+        for _, payload in reader.scan():
+            yield payload.tobytes()
+            payload.release()
+
+
+def chunks(lines: Iterable[str or bytes], size: int) -> Iterator[List[str or bytes]]:
+    """
+    Splits the orders into chunks
+
+    :param lines: The json of each order
+    :param size: The amount of orders in each chunk
+    :return: Each chunk of orders
+    """
+    iterator: Iterator[str or bytes] = iter(lines)
+    while True:
+        chunk: List[str or bytes] = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def render_receipts(lines: Iterable[str or bytes], out: TextIO, workers: int,
+                    chunk_size: int = CHUNK_SIZE, recorded: bool = False) -> Tuple[int, int]:
+    """
+    Renders the receipt of every order across a pool of processes and
+    writes them in the same order as the orders were read. Only a few
+    chunks are queued for each worker so the orders are streamed
+    instead of all being read into memory first
+
+    :param lines: The json of each order
+    :param out: Where to write the receipts
+    :param workers: The amount of worker processes
+    :param chunk_size: The amount of orders each worker renders at a time
+    :param recorded: Whether the orders are journal records (reprinted as they were charged)
+    :return: The amount of receipts rendered and orders rejected
+    """
+    rendered: int = 0
+    rejected: int = 0
+    # The chunks being rendered in the order they were read
+    pending: Deque[Future] = deque()
+
+    def finish(future: Future) -> NoReturn:
+        nonlocal rendered, rejected
+        text, amount, messages = future.result()
+        out.write(text)
+        rendered += amount
+        rejected += len(messages)
+        for message in messages:
+            sys.stderr.write(message + '\n')
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks(lines, chunk_size):
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                # Wait for the oldest chunk before reading any more
+                finish(pending.popleft())
+            pending.append(executor.submit(render_chunk, chunk, recorded))
+        while pending:
+            finish(pending.popleft())
+    return rendered, rejected
+
+
+def run() -> NoReturn:
+    """
+    Runs the bulk receipt rendering from the command line
+    """
+    parser: ArgumentParser = ArgumentParser(description='Renders the receipts of many orders at once')
+    parser.add_argument('file', nargs='?', help='The json lines orders (defaults to stdin)')
+    parser.add_argument('--journal', action='store_true', help='Read the orders from an order journal')
+    parser.add_argument('-o', '--output', help='The file to write the receipts to (defaults to stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='The amount of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='The amount of orders in each chunk')
+    args = parser.parse_args()
+
+    if args.journal and not args.file:
+        parser.error('--journal needs the path of the journal')
+
+    start: float = perf_counter()
+    with ExitStack() as stack:
+        if args.journal:
+            lines: Iterable[str or bytes] = read_journal(args.file)
+        elif args.file:
+            lines: Iterable[str or bytes] = read_lines(stack.enter_context(open(args.file)))
+        else:
+            lines: Iterable[str or bytes] = read_lines(sys.stdin)
+        out: TextIO = stack.enter_context(open(args.output, 'w')) if args.output else sys.stdout
+        rendered, rejected = render_receipts(lines, out, args.workers, args.chunk_size, args.journal)
+    elapsed: float = perf_counter() - start
+    message: str = 'Rendered {} receipts ({} rejected) in {:.2f}s ({:.0f} receipts/s) using {} processes\n'
+    sys.stderr.write(message.format(
+        rendered, rejected, elapsed, rendered / elapsed if elapsed > 0 else 0, args.workers
+    ))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,252 @@
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import Dict, List, NoReturn, Tuple
+
+from guiutil import BOX_TOP, BOX_SPLITTER, BOX_BOTTOM, TITLE_FISH, Sink, create_title, format_price, item_padded
+from journal import JournalPosition, JournalReader, decode_record
+from main import JOURNAL_PATH, MENU_SOURCE
+from menu import MenuIndex
+from money import SCOOPS_SCALE, to_tenths
+
+ROLLUP_VERSION: int = 2  # Rollups saved by any other version are rebuilt
+ROLLUP_SUFFIX: str = '.rollup'  # The rollups are saved next to the journal with this suffix
+UNKNOWN_TYPE: str = 'Not on the menu'  # The type of fish that aren't on the current menu
+TITLE_TYPES: str = create_title('Menu Types (Quantity):')  # The title above the menu types in a report
+
+# The counters kept for each day, money is in cents and scoops are in tenths
+COUNTERS: Tuple[str, ...] = (
+    'orders', 'chips_lots', 'chips_tenths', 'frozen_orders', 'discount',
+    'delivery_orders', 'delivery_revenue', 'total', 'gst', 'total_inc_gst'
+)
+
+
+def new_totals() -> dict:
+    """
+    :return: The totals of a day without any orders
+    """
+    totals: dict = dict.fromkeys(COUNTERS, 0)
+    totals['fish'] = {}
+    return totals
+
+
+def add_order(totals: dict, record: dict) -> NoReturn:
+    """
+    Adds a finished order to the totals of its day
+
+    :param totals: The totals of the day
+    :param record: The order record from the journal
+    """
+    totals['orders'] += 1
+    fish: Dict[str, int] = totals['fish']
+    for fish_type, amount in record['fish'].items():
+        fish[fish_type] = fish.get(fish_type, 0) + amount
+    chips: List[float] = record['chips']
+    totals['chips_lots'] += len(chips)
+    totals['chips_tenths'] += sum(to_tenths(scoops) for scoops in chips)
+    if record['frozen']:
+        totals['frozen_orders'] += 1
+        totals['discount'] += record['discount']
+    if record['delivery']:
+        totals['delivery_orders'] += 1
+        # Orders recorded before the charge was stored don't count towards the revenue
+        totals['delivery_revenue'] += record.get('delivery_charge', 0)
+    totals['total'] += record['total']
+    totals['gst'] += record['gst']
+    totals['total_inc_gst'] += record['total_inc_gst']
+
+
+def add_totals(into: dict, totals: dict) -> NoReturn:
+    """
+    Adds the totals of one day onto another (e.g to report many days at once)
+
+    :param into: The totals being added to
+    :param totals: The totals to add
+    """
+    for counter in COUNTERS:
+        into[counter] += totals[counter]
+    fish: Dict[str, int] = into['fish']
+    for fish_type, amount in totals['fish'].items():
+        fish[fish_type] = fish.get(fish_type, 0) + amount
+
+
+class Rollup:
+    path: str  # The path the rollups are saved to
+    position: JournalPosition  # How far through the journal the rollups go
+    days: Dict[str, dict]  # The totals of each day (as YYYY-MM-DD)
+
+    def __init__(self, path: str) -> None:
+        """
+        The totals of each day that have been added up so far and how far
+        through the journal they go. The rollups are saved so the next run
+        only has to read the orders that were finished since the last run
+
+        :param path: The path the rollups are saved to
+        """
+        self.path = path
+        self.position = JournalPosition()
+        self.days = {}
+        try:
+            with open(path) as file:
+                saved: dict = json.load(file)
+            if saved.get('version') == ROLLUP_VERSION:
+                self.position = JournalPosition(**saved['position'])
+                self.days = saved['days']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # There are no rollups yet or they can't be read so they are rebuilt
+
+    def update(self, journal_path: str) -> int:
+        """
+        Adds the orders finished since the last update to the rollups
+        in a single pass over the new part of the journal
+
+        :param journal_path: The path of the journal
+        :return: The amount of orders that were added
+        """
+        if not os.path.exists(journal_path):
+            return 0
+        added: int = 0
+        day: str = ''
+        totals: dict or None = None
+        # The local day only changes at midnight so it is only worked out again after that
+        day_start: float = 0
+        day_end: float = 0
+        with JournalReader(journal_path) as reader:
+            if not self.position.resume(reader):
+                # The journal was rotated or replaced so everything is added up again
+                self.days = {}
+            for payload in self.position.scan(reader):
+                record: dict = decode_record(payload)
+                payload.release()
+                finished: float = record['time']
+                if not day_start <= finished < day_end:
+                    start: datetime = datetime.combine(
+                        datetime.fromtimestamp(finished).date(), datetime.min.time()
+                    )
+                    day_start = start.timestamp()
+                    day_end = (start + timedelta(days=1)).timestamp()
+                    day = start.date().isoformat()
+                    totals = self.days.get(day)
+                    if totals is None:
+                        totals = self.days[day] = new_totals()
+                add_order(totals, record)
+                added += 1
+        return added
+
+    def save(self) -> NoReturn:
+        """
+        Writes the rollups to their file all at once
+        so a crash never leaves a half written file
+        """
+        temporary: str = self.path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'version': ROLLUP_VERSION, 'position': self.position.to_record(), 'days': self.days}, file)
+        os.replace(temporary, self.path)
+
+    def totals(self, days: List[str] or None = None) -> dict:
+        """
+        Adds up the totals of some days
+
+        :param days: The days to add up (defaults to every day)
+        :return: The totals of the days
+        """
+        totals: dict = new_totals()
+        for day in self.days if days is None else days:
+            if day in self.days:
+                add_totals(totals, self.days[day])
+        return totals
+
+
+def write_report(title: str, totals: dict, menu: MenuIndex, sink: Sink) -> NoReturn:
+    """
+    Renders a report of the totals piece by piece into the sink
+    grouping the fish by the types on the menu
+
+    :param title: The title of the report (e.g the day)
+    :param totals: The totals being reported
+    :param menu: The compiled menu index the fish are grouped by
+    :param sink: Accepts each piece of the report
+    """
+    sink(BOX_TOP)
+    sink(create_title(title))
+    sink(BOX_SPLITTER)
+    sink(item_padded(f' Orders: {totals["orders"]}'))
+
+    fish: Dict[str, int] = totals['fish']
+    if fish:
+        sink(BOX_SPLITTER)
+        sink(TITLE_FISH)
+        sink(BOX_SPLITTER)
+        # The best selling fish first
+        for fish_type, amount in sorted(fish.items(), key=lambda item: (-item[1], item[0])):
+            sink(item_padded(f' {fish_type} {amount}'))
+
+        # The types are in the same order as the menu with anything no longer on the menu last
+        types: Dict[str, int] = {menu_type['name']: 0 for menu_type in menu.types}
+        for fish_type, amount in fish.items():
+            menu_type: str = menu.item_types.get(fish_type, UNKNOWN_TYPE)
+            types[menu_type] = types.get(menu_type, 0) + amount
+        sink(BOX_SPLITTER)
+        sink(TITLE_TYPES)
+        sink(BOX_SPLITTER)
+        for menu_type, amount in types.items():
+            if amount > 0:
+                sink(item_padded(f' {menu_type} {amount}'))
+
+    sink(BOX_SPLITTER)
+    sink(item_padded(f' Chips: {totals["chips_tenths"] / SCOOPS_SCALE} scoops ({totals["chips_lots"]} lots)'))
+    sink(item_padded(f' Frozen orders: {totals["frozen_orders"]}'))
+    sink(item_padded(f' Frozen discounts: {format_price(totals["discount"])}'))
+    sink(item_padded(f' Delivery orders: {totals["delivery_orders"]}'))
+    sink(item_padded(f' Delivery revenue: {format_price(totals["delivery_revenue"])}'))
+    sink(BOX_SPLITTER)
+    sink(item_padded(f' TOTAL: {format_price(totals["total"])}'))
+    sink(item_padded(f' TOTAL GST: {format_price(totals["gst"])}'))
+    sink(item_padded(f' TOTAL INC GST: {format_price(totals["total_inc_gst"])}'))
+    sink(BOX_BOTTOM)
+    sink('\n')
+
+
+def run() -> NoReturn:
+    """
+    Runs the end of day report from the command line
+    """
+    parser: ArgumentParser = ArgumentParser(description='Reports the sales of the finished orders')
+    parser.add_argument('journal', nargs='?', default=JOURNAL_PATH, help='The order journal')
+    parser.add_argument('--day', help='The day to report as YYYY-MM-DD (defaults to today)')
+    parser.add_argument('--all', action='store_true', help='Report every day in the journal')
+    parser.add_argument('--json', action='store_true', help='Write the totals as json (money in cents)')
+    parser.add_argument('--rebuild', action='store_true', help='Add up the whole journal again')
+    args = parser.parse_args()
+
+    start: float = perf_counter()
+    rollup: Rollup = Rollup(args.journal + ROLLUP_SUFFIX)
+    if args.rebuild:
+        rollup.position = JournalPosition()
+        rollup.days = {}
+    added: int = rollup.update(args.journal)
+    if added > 0 or args.rebuild:
+        rollup.save()
+    elapsed: float = perf_counter() - start
+
+    if args.all:
+        title: str = 'Sales Report (All Days)'
+        totals: dict = rollup.totals()
+    else:
+        day: str = args.day or date.today().isoformat()
+        title: str = f'Sales Report ({day})'
+        totals: dict = rollup.totals([day])
+
+    if args.json:
+        sys.stdout.write(json.dumps(totals) + '\n')
+    else:
+        MENU_SOURCE.refresh()
+        write_report(title, totals, MENU_SOURCE.index, sys.stdout.write)
+    sys.stderr.write(f'Added {added} new orders in {elapsed:.2f}s\n')
+
+
+if __name__ == '__main__':
+    run()
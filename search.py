@@ -0,0 +1,160 @@
+from collections import Counter
+from functools import lru_cache
+from heapq import nsmallest
+from itertools import chain
+from typing import Dict, List, Set, Tuple
+
+from menu import MenuIndex
+
+RESULT_LIMIT: int = 8  # The most matches a search returns (and the most kept at each trie node)
+GRAM_SIZE: int = 3  # The length of the n-grams used to find names with typos
+MIN_SIMILARITY: float = 0.3  # How similar a name must be to match a search with typos (0 to 1)
+INDEX_CACHE_SIZE: int = 4  # The amount of menu versions to keep search indexes for
+
+# A match is the ordinal of the item and its name
+Match = Tuple[int, str]
+
+
+def normalize(text: str) -> str:
+    """
+    :param text: The text to normalize
+    :return: The text in lowercase with single spaces between words
+    """
+    return ' '.join(text.lower().split())
+
+
+def grams(text: str) -> Set[str]:
+    """
+    Splits text into overlapping n-grams. The text is padded so the
+    start and end of the text (which people rarely get wrong) count more
+
+    :param text: The normalized text
+    :return: The n-grams of the text
+    """
+    padded: str = ' ' * (GRAM_SIZE - 1) + text + ' '
+    return {padded[index:index + GRAM_SIZE] for index in range(len(padded) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    names: List[str]  # The name of each ordinal as displayed (ordinal 1 is index 0)
+    exact: Dict[str, int]  # The normalized name of each item mapped to its ordinal
+    trie: tuple  # The root of the prefix trie, each node is its children and its best matches
+    postings: Dict[str, List[int]]  # Each n-gram mapped to the ordinals of the names containing it
+    gram_counts: List[int]  # The amount of n-grams in the name of each ordinal
+
+    def __init__(self, menu: MenuIndex) -> None:
+        """
+        Indexes the names on a menu so they can be searched by the start
+        of any word in the name, or with typos by the n-grams they share
+
+        :param menu: The compiled menu index
+        """
+        self.names = menu.ordinals
+        self.exact = {}
+        self.trie = ({}, [])
+        self.postings = {}
+        self.gram_counts = []
+        # Every word of every name is a place a search can start from
+        entries: List[Tuple[int, int, int, str]] = []
+        for ordinal, name in enumerate(menu.ordinals, 1):
+            text: str = normalize(name)
+            self.exact.setdefault(text, ordinal)
+            words: List[str] = text.split(' ')
+            start: int = 0
+            for word_index, word in enumerate(words):
+                # Matching the start of the name ranks above matching a later word
+                # then shorter names rank higher as more of the name was typed
+                entries.append((min(word_index, 1), len(text), ordinal, text[start:]))
+                start += len(word) + 1
+            name_grams: Set[str] = grams(text)
+            self.gram_counts.append(len(name_grams))
+            for gram in name_grams:
+                self.postings.setdefault(gram, []).append(ordinal)
+        # Inserted best first so each node just keeps the first matches it sees
+        entries.sort()
+        for _, _, ordinal, text in entries:
+            node: tuple = self.trie
+            for char in text:
+                child: tuple or None = node[0].get(char)
+                if child is None:
+                    child = node[0][char] = ({}, [])
+                node = child
+                matches: List[int] = node[1]
+                if len(matches) < RESULT_LIMIT and ordinal not in matches:
+                    matches.append(ordinal)
+
+    def prefix(self, text: str) -> List[int]:
+        """
+        Finds the names with a word starting with the text
+
+        :param text: The normalized text
+        :return: The ordinals of the best matches
+        """
+        node: tuple = self.trie
+        for char in text:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1]
+
+    def similar(self, text: str, limit: int) -> List[int]:
+        """
+        Finds the names sharing the most n-grams with the text (so
+        names with a letter or two wrong are still found)
+
+        :param text: The normalized text
+        :param limit: The most matches to find
+        :return: The ordinals of the best matches
+        """
+        text_grams: Set[str] = grams(text)
+        # The amount of n-grams each name shares with the text (counted in one pass)
+        shared: Counter = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in text_grams))
+        # A name can't be similar enough without sharing at least this many n-grams
+        least: float = MIN_SIMILARITY * len(text_grams) / 2
+        scored: List[Tuple[float, int]] = []
+        for ordinal, count in shared.items():
+            if count < least:
+                continue
+            # The dice coefficient of the two sets of n-grams
+            similarity: float = 2 * count / (len(text_grams) + self.gram_counts[ordinal - 1])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((-similarity, ordinal))
+        return [ordinal for _, ordinal in nsmallest(limit, scored)]
+
+    def search(self, query: str, limit: int = RESULT_LIMIT) -> List[Match]:
+        """
+        Finds the items matching a typed name, best match first. An exact
+        name comes first, then names with a word starting with the query,
+        then names that are similar to the query
+
+        :param query: The typed name
+        :param limit: The most matches to return
+        :return: The ordinal and name of each match
+        """
+        text: str = normalize(query)
+        if not text:
+            return []
+        ordinals: List[int] = []
+        exact: int or None = self.exact.get(text)
+        if exact is not None:
+            ordinals.append(exact)
+        for ordinal in self.prefix(text):
+            if ordinal not in ordinals:
+                ordinals.append(ordinal)
+        if len(ordinals) < limit:
+            for ordinal in self.similar(text, limit):
+                if ordinal not in ordinals:
+                    ordinals.append(ordinal)
+        return [(ordinal, self.names[ordinal - 1]) for ordinal in ordinals[:limit]]
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def search_index(menu: MenuIndex) -> SearchIndex:
+    """
+    Finds the search index of a menu version, it is only built
+    the first time the menu version is searched
+
+    :param menu: The compiled menu index
+    :return: The search index of the menu
+    """
+    return SearchIndex(menu)
@@ -0,0 +1,191 @@
+import asyncio
+from argparse import ArgumentParser
+from typing import NoReturn
+
+import console
+from console import Console
+from dashboard import REFRESH_INTERVAL, CLEAR_SCREEN, create_panel, sales
+from journal import JournalLockedError, JournalWriter
+from main import main, Session, JOURNAL_PATH
+from metrics import write_metrics
+from order import Order
+
+METRICS_INTERVAL: float = 15.0  # The seconds between writing the metrics
+
+
+class StreamConsole(Console):
+    reader: asyncio.StreamReader  # The stream the till sends its input on
+    writer: asyncio.StreamWriter  # The stream the output is sent to the till on
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        A console for a till connected over the network
+
+        :param reader: The stream the till sends its input on
+        :param writer: The stream the output is sent to the till on
+        """
+        # Tills are terminals so they always get colors
+        super().__init__(color=True)
+        self.reader = reader
+        self.writer = writer
+
+    async def read(self, message: str) -> str:
+        """
+        Sends the screen to the till and waits for
+        it to send back a line of input without blocking
+        any of the other tills
+
+        :param message: The message to display to the user
+        :return: The line the user entered
+        """
+        self.buffer.append(message)
+        self.flush()
+        await self.writer.drain()
+        line: bytes = await self.reader.readline()
+        if not line:  # The till disconnected
+            raise EOFError()
+        # Bytes that aren't valid text are replaced so the screens reject the input like any other typo
+        return line.decode(errors='replace').rstrip('\r\n')
+
+    def send(self, data: bytes) -> NoReturn:
+        """
+        Sends a screen to the till
+
+        :param data: The encoded screen
+        """
+        self.writer.write(data)
+
+
+class TillSession(Session):
+
+    async def record(self, order: Order) -> NoReturn:
+        """
+        Keeps a record of a finished order in the journal. The journal
+        is written (and synced to disk) on a worker thread so a slow
+        disk doesn't stall every other till on the event loop
+
+        :param order: The finished order
+        """
+        if self.journal is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.journal.append_order, order)
+
+
+async def handle_till(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                      journal: JournalWriter or None) -> NoReturn:
+    """
+    Runs a session for a newly connected till. Each connection
+    runs in its own task so it has its own console and session
+
+    :param reader: The stream the till sends its input on
+    :param writer: The stream the output is sent to the till on
+    :param journal: The journal shared by every till (None to not record orders)
+    """
+    console.set_console(StreamConsole(reader, writer))
+    try:
+        await main(TillSession(journal))
+        console.flush()  # Send the last screen
+        await writer.drain()
+    except (EOFError, ConnectionError):
+        pass  # The till disconnected part way through the session
+    finally:
+        writer.close()
+
+
+async def start_server(host: str, port: int, journal: JournalWriter or None = None) -> asyncio.AbstractServer:
+    """
+    Starts listening for tills
+
+    :param host: The host to listen on
+    :param port: The port to listen on (0 picks a free port)
+    :param journal: The journal finished orders are written to (None to not record orders)
+    :return: The started server
+    """
+    # A large backlog so that a rush of tills connecting at once isn't refused
+    return await asyncio.start_server(
+        lambda reader, writer: handle_till(reader, writer, journal),
+        host, port, backlog=1024
+    )
+
+
+async def sync_journal(journal: JournalWriter) -> NoReturn:
+    """
+    Syncs the journal every interval so that the last orders
+    before a quiet period don't wait for the next order to be synced
+
+    :param journal: The journal to sync
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(journal.sync_interval)
+        await loop.run_in_executor(None, journal.sync)
+
+
+async def export_metrics(path: str, interval: float) -> NoReturn:
+    """
+    Writes the metrics every interval so a collector (e.g the
+    prometheus textfile collector) can pick them up
+
+    :param path: The file to write the metrics to
+    :param interval: The seconds between writing the metrics
+    """
+    while True:
+        await asyncio.sleep(interval)
+        write_metrics(path)
+
+
+async def show_dashboard(interval: float) -> NoReturn:
+    """
+    Redraws the live sales of every till on the terminal every interval
+
+    :param interval: The seconds between redraws
+    """
+    while True:
+        print(CLEAR_SCREEN + create_panel(sales), end='', flush=True)
+        await asyncio.sleep(interval)
+
+
+async def serve(host: str, port: int, journal_path: str, metrics_path: str or None = None,
+                dashboard: bool = False) -> NoReturn:
+    """
+    Serves tills until the program is stopped
+
+    :param host: The host to listen on
+    :param port: The port to listen on
+    :param journal_path: The file finished orders are recorded in
+    :param metrics_path: The file the metrics are written to (None to not write them)
+    :param dashboard: Whether or not to show the live sales on the terminal
+    """
+    journal: JournalWriter = JournalWriter(journal_path)
+    server: asyncio.AbstractServer = await start_server(host, port, journal)
+    for socket in server.sockets:
+        print('Serving tills on {}:{}'.format(*socket.getsockname()[:2]))
+    tasks: list = [asyncio.create_task(sync_journal(journal))]
+    if metrics_path is not None:
+        tasks.append(asyncio.create_task(export_metrics(metrics_path, METRICS_INTERVAL)))
+    if dashboard:
+        tasks.append(asyncio.create_task(show_dashboard(REFRESH_INTERVAL)))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        journal.close()
+        if metrics_path is not None:
+            write_metrics(metrics_path)
+
+
+if __name__ == '__main__':
+    parser: ArgumentParser = ArgumentParser(description='Serves the ordering system to tills over TCP')
+    parser.add_argument('--host', default='127.0.0.1', help='The host to listen on')
+    parser.add_argument('--port', type=int, default=9000, help='The port to listen on')
+    parser.add_argument('--journal', default=JOURNAL_PATH, help='The file finished orders are recorded in')
+    parser.add_argument('--metrics', help='Write the metrics to this file (json if it ends with .json)')
+    parser.add_argument('--dashboard', action='store_true', help='Show the live sales of every till')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.journal, args.metrics, args.dashboard))
+    except KeyboardInterrupt:
+        pass
+    except JournalLockedError as e:
+        raise SystemExit(str(e))  # Another server or till is already writing the journal
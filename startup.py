@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import List, NoReturn, Tuple
+
+from guiutil import ARROW
+
+DIRECTORY: str = os.path.dirname(os.path.abspath(__file__))  # The directory the program is in
+MAIN_PATH: str = os.path.join(DIRECTORY, 'main.py')  # The program being measured
+MENU_PATH: str = os.path.join(DIRECTORY, 'menu.json')  # The menu file the caches are built from
+# The caches built from the menu file (removed to measure a cold start)
+CACHE_PATHS: List[str] = [MENU_PATH + '.snapshot', MENU_PATH + '.frames.snapshot']
+PROMPT_END: bytes = f': {ARROW} '.encode()  # Every prompt ends with this so it marks the first screen
+
+
+def time_to_prompt(directory: str) -> float:
+    """
+    Starts the program and times how long it takes for the first
+    prompt to be written (the till is ready for the user)
+
+    :param directory: The directory to run the program in (its journal is written there)
+    :return: The seconds until the first prompt
+    """
+    start: float = perf_counter()
+    process: subprocess.Popen = subprocess.Popen(
+        [sys.executable, MAIN_PATH], cwd=directory,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    output: bytes = b''
+    while not output.endswith(PROMPT_END):
+        chunk: bytes = process.stdout.read1(65536)
+        if not chunk:
+            raise RuntimeError('The program exited before the first prompt')
+        output += chunk
+    seconds: float = perf_counter() - start
+    process.stdin.close()  # End of input makes the program exit
+    process.wait()
+    return seconds
+
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """
+    Measures how long importing each module takes
+
+    :return: The name, own microseconds and cumulative microseconds of each module
+    """
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=DIRECTORY, capture_output=True, text=True
+    )
+    modules: List[Tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def remove_caches() -> NoReturn:
+    """
+    Removes the caches so the next start has to build them
+    """
+    for path in CACHE_PATHS:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def run() -> NoReturn:
+    """
+    Prints the startup profile report
+    """
+    parser: ArgumentParser = ArgumentParser(description='Reports how long the till takes to start')
+    parser.add_argument('--runs', type=int, default=10, help='The amount of warm starts to time')
+    parser.add_argument('--top', type=int, default=15, help='The amount of slowest imports to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        remove_caches()
+        cold: float = time_to_prompt(directory)
+        warm: List[float] = [time_to_prompt(directory) for _ in range(args.runs)]
+
+    # The interpreter alone is measured so the program's own cost can be seen
+    start: float = perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'])
+    interpreter: float = perf_counter() - start
+
+    print('Time to first prompt')
+    print(f'  Cold (no caches): {cold * 1000:8.1f}ms')
+    print(f'  Warm (median of {args.runs}): {median(warm) * 1000:8.1f}ms (best {min(warm) * 1000:.1f}ms)')
+    print(f'  Interpreter only: {interpreter * 1000:8.1f}ms')
+
+    modules: List[Tuple[str, int, int]] = import_times()
+    total: int = sum(own for _, own, _ in modules)
+    print()
+    print(f'Imports ({len(modules)} modules, {total / 1000:.1f}ms)')
+    print(f'  {"Module":<40} {"Self":>9} {"Cumulative":>11}')
+    for name, own, cumulative in sorted(modules, key=lambda module: module[1], reverse=True)[:args.top]:
+        print(f'  {name:<40} {own / 1000:>7.1f}ms {cumulative / 1000:>9.1f}ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,58 @@
+import json
+import os
+import random
+import unittest
+from typing import List
+
+from menu import MenuIndex
+from order import Order, OrderConfig
+
+try:
+    import batch
+except ImportError:
+    batch = None  # numpy isn't installed so there is nothing to test
+
+ORDERS: int = 3000  # The amount of random orders priced both ways
+SEED: int = 91890  # Makes the random orders the same every run
+MENU_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'menu.json')
+
+
+def random_order(config: OrderConfig, rng: random.Random) -> Order:
+    """
+    Makes an order with a random amount of random items (sometimes none)
+
+    :param config: The config the order is created with
+    :param rng: The random number generator
+    :return: The order
+    """
+    order: Order = Order(config)
+    order.frozen = rng.random() < 0.5
+    order.delivery = rng.random() < 0.5
+    fish_types: List[str] = list(config.menu.item_ordinals)
+    for fish_type in rng.sample(fish_types, rng.randint(0, min(8, len(fish_types)))):
+        order.add_fish(fish_type, rng.randint(1, config.max_per_fish))
+    for _ in range(rng.randint(0, config.max_amount_chips)):
+        order.add_chips(rng.randint(1, int(config.max_scoops_chips * 10)) / 10)
+    return order
+
+
+@unittest.skipIf(batch is None, 'numpy is not installed')
+class BatchPricesTest(unittest.TestCase):
+
+    def test_batch_matches_scalar_prices(self) -> None:
+        with open(MENU_PATH) as file:
+            menu: MenuIndex = MenuIndex(json.load(file)['types'])
+        config: OrderConfig = OrderConfig(7, 5, 10, 105, 1500, 500, menu)
+        rng: random.Random = random.Random(SEED)
+        orders: List[Order] = [random_order(config, rng) for _ in range(ORDERS)]
+
+        prices = batch.calculate_batch_prices(
+            batch.OrderBatch.from_orders(orders, menu), menu,
+            config.frozen_discount, config.gst_amount, config.delivery_charge
+        )
+        for row, order in enumerate(orders):
+            self.assertEqual(order.calculate_prices(), tuple(int(column[row]) for column in prices))
+
+
+if __name__ == '__main__':
+    unittest.main()
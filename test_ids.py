@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from typing import List
+
+import ids
+
+PROCESSES: int = 4  # The amount of forked processes making ids at once
+IDS_PER_PROCESS: int = 5000  # The amount of ids each process makes
+
+
+def make_ids(count: int) -> List[str]:
+    """
+    Makes order ids in a worker process
+
+    :param count: The amount of ids to make
+    :return: The ids
+    """
+    return [ids.next_order_id() for _ in range(count)]
+
+
+class ForkedIdsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.environ = dict(os.environ)
+        os.environ['FFF_SHARD_DIR'] = self.directory.name
+        os.environ.pop('FFF_SHARD', None)
+        ids.set_generator(None)
+
+    def tearDown(self) -> None:
+        os.environ.clear()
+        os.environ.update(self.environ)
+        ids.set_generator(None)
+        self.directory.cleanup()
+
+    def test_forked_processes_make_unique_ids(self) -> None:
+        # The parent makes ids first so the children inherit a generator that was in use
+        made: List[str] = make_ids(IDS_PER_PROCESS)
+        context = multiprocessing.get_context('fork')
+        with context.Pool(PROCESSES) as pool:
+            for chunk in pool.map(make_ids, [IDS_PER_PROCESS] * PROCESSES):
+                made.extend(chunk)
+        self.assertEqual(len(made), len(set(made)))
+
+    def test_explicit_shard_is_exclusive(self) -> None:
+        os.environ['FFF_SHARD'] = '7'
+        self.assertEqual(ids.allocate_shard(), 7)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            # Another process can't claim the shard this process holds
+            with self.assertRaises(RuntimeError):
+                pool.apply(ids.allocate_shard)
+
+
+if __name__ == '__main__':
+    unittest.main()